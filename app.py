@@ -1,26 +1,69 @@
+import atexit
 import hashlib
+import itertools
 import json
 import os
 import pickle
+import queue
 import re
 import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from io import BytesIO
+from threading import BoundedSemaphore
 from urllib.parse import urlencode
 
-import pdfplumber
-import requests
 from dotenv import load_dotenv
-from flask import Flask, jsonify, redirect, render_template, request, send_file, session
+from flask import Flask, Response, jsonify, redirect, render_template, request, send_file, session
 from flask_cors import CORS
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
-from pymongo.errors import DuplicateKeyError
-
-from backend.config.mongo import course_collection
+from pymongo.errors import ConnectionFailure
+
+from backend.config.storage import (
+    course_store,
+    job_collection,
+    lease_collection,
+    on_storage_ready,
+    optin_store,
+    study_plan_store,
+)
+from backend.cache_migration import CACHE_MIGRATION_ON_STARTUP, migrate_cache_documents, migrate_shared_discords
+from backend.circuit_breaker import STATE_CLOSED, CircuitBreaker
+from backend.chunking import merge_extracted_events, normalize_title, split_text_into_chunks
+from backend.doc_cache import COURSE_CACHE_L1_ENABLED, DocumentCache
+from backend.date_parser import (
+    DATE_TOKEN_RE,
+    find_dates,
+    find_term_mention,
+    infer_term,
+    parse_date_string,
+    resolve_date,
+)
+from backend.discord_optins import DiscordOptIns
+from backend.http_client import get_session, http_timeout
 from backend.ics_converter import json_to_ics
+from backend.jobs import FINISHED_STATES, InMemoryJobStore, JobRunner, MongoJobStore, public_job_view
+from backend.prompt_filter import filter_date_lines
+from backend.revisions import INCREMENTAL_EXTRACTION_ENABLED, diff_events, page_index, plan_incremental
+from backend.pdf_extraction import EXTRACTOR_VERSION, extract_page_texts, iter_page_texts, join_page_texts
+from backend.similarity import (
+    NEAR_DUPLICATE_ENABLED,
+    NEAR_DUPLICATE_MAX_CANDIDATES,
+    NEAR_DUPLICATE_THRESHOLD,
+    diff_date_lines,
+    estimate_similarity,
+    text_fingerprint,
+)
+from backend.singleflight import AbandonedCall, MongoLease, SingleFlight
+from backend.stream_parser import JsonArrayStreamParser
 from backend.study_guide_generator import generate_study_guide_pdf
+from backend.study_plan_cache import StudyPlanCache, study_plan_cache_key
+from backend.text_cache import TEXT_CACHE_DIR, TEXT_CACHE_ENABLED, TEXT_CACHE_MAX_BYTES, PageTextCache
+from backend.uploads import MAX_UPLOAD_BYTES, SpoolingRequest, discard_detached, read_upload
+from backend.write_behind import WRITE_BEHIND_ENABLED, WriteBehindQueue
 
 
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
@@ -29,6 +72,15 @@ app = Flask(__name__)
 CORS(app)
 app.secret_key = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
 
+# ----------------------------
+# Upload Configuration
+# ----------------------------
+# Uploaded files are hashed while they stream in and spooled to disk past
+# UPLOAD_SPOOL_KB; bodies declaring more than MAX_UPLOAD_MB are rejected (413)
+# before anything is buffered.
+app.request_class = SpoolingRequest
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
+
 # ----------------------------
 # Session Configuration (Fixes "State mismatch" on localhost)
 # ----------------------------
@@ -53,80 +105,477 @@ _pending_oauth_states = {}
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "google/gemini-pro")
+# Bump whenever the extraction prompt or pre-processing changes (keys the text-level cache)
+EXTRACTION_PROMPT_VERSION = "1"
+
+# Long documents are split into overlapping chunks extracted concurrently
+OPENROUTER_CHUNKED_EXTRACTION = os.getenv("OPENROUTER_CHUNKED_EXTRACTION", "true").lower() == "true"
+OPENROUTER_CHUNK_CHARS = int(os.getenv("OPENROUTER_CHUNK_CHARS", "12000"))
+OPENROUTER_CHUNK_OVERLAP = int(os.getenv("OPENROUTER_CHUNK_OVERLAP", "600"))
+OPENROUTER_CHUNK_CONCURRENCY = int(os.getenv("OPENROUTER_CHUNK_CONCURRENCY", "8"))
+# Only date-bearing lines (plus context and headers) are sent to the model
+LLM_PREFILTER = os.getenv("LLM_PREFILTER", "true").lower() == "true"
+LLM_PREFILTER_CONTEXT_LINES = int(os.getenv("LLM_PREFILTER_CONTEXT_LINES", "1"))
+_llm_chunk_pool = ThreadPoolExecutor(max_workers=OPENROUTER_CHUNK_CONCURRENCY, thread_name_prefix="llm-chunk")
+
+# Extraction calls get a latency budget and sit behind a circuit breaker; when
+# the breaker is open or the budget runs out, the local parser's results are
+# returned flagged as low-accuracy and the cache entry is marked needs_upgrade.
+LLM_LATENCY_BUDGET_SECONDS = float(os.getenv("LLM_LATENCY_BUDGET_SECONDS", "25"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+LOCAL_FALLBACK_ACCURACY = 50.0
+llm_breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS, name="OpenRouter")
 
 DISCORD_CLIENT_ID = os.getenv("DISCORD_CLIENT_ID")
 DISCORD_CLIENT_SECRET = os.getenv("DISCORD_CLIENT_SECRET")
 DISCORD_REDIRECT_URI = os.getenv("DISCORD_REDIRECT_URI")
+# Classmate lookups are paged; clients may ask for up to the max per page
+DISCORD_MATCHES_PAGE_SIZE = int(os.getenv("DISCORD_MATCHES_PAGE_SIZE", "50"))
+DISCORD_MATCHES_MAX_PAGE_SIZE = 200
 
 USE_LOCAL_FALLBACK = os.getenv("USE_LOCAL_FALLBACK", "true").lower() == "true"
+PDF_STREAMING_EXTRACTION = os.getenv("PDF_STREAMING_EXTRACTION", "false").lower() == "true"
+PDF_EARLY_STOP = os.getenv("PDF_EARLY_STOP", "true").lower() == "true"
 LOW_ACCURACY_THRESHOLD = 80.0
+# Bump whenever normalize_extracted_assignments() output changes; older cache
+# documents are re-normalized by the startup migration (or lazily on read).
+CACHE_SCHEMA_VERSION = 1
+
+# ----------------------------
+# Extraction Jobs (POST /extract_assignments?mode=async)
+# ----------------------------
+# "memory" keeps job records in this process; "mongo" shares them across
+# worker processes so any of them can answer /jobs/<id> polls.
+EXTRACTION_JOB_BACKEND = os.getenv("EXTRACTION_JOB_BACKEND", "memory").lower()
+JOB_EVENTS_MAX_SECONDS = int(os.getenv("JOB_EVENTS_MAX_SECONDS", "300"))
+
+if EXTRACTION_JOB_BACKEND == "mongo" and job_collection is not None:
+    job_store = MongoJobStore(job_collection)
+else:
+    job_store = InMemoryJobStore()
+job_runner = JobRunner(job_store)
+
+# ----------------------------
+# Upload Coalescing
+# ----------------------------
+# Concurrent cold uploads of the same PDF share one extraction. With
+# EXTRACTION_LEASE_ENABLED, a lease document in Mongo extends this across
+# worker processes.
+EXTRACTION_LEASE_ENABLED = os.getenv("EXTRACTION_LEASE_ENABLED", "false").lower() == "true"
+EXTRACTION_LEASE_SECONDS = int(os.getenv("EXTRACTION_LEASE_SECONDS", "120"))
+
+extraction_flight = SingleFlight()
+extraction_lease = (
+    MongoLease(lease_collection, EXTRACTION_LEASE_SECONDS)
+    if EXTRACTION_LEASE_ENABLED and lease_collection is not None else None
+)
+
+# ----------------------------
+# Cache Write-Behind
+# ----------------------------
+# With WRITE_BEHIND_ENABLED, cold responses return before their cache writes;
+# a background thread flushes them in batches (see backend/write_behind.py).
+def _on_cache_writes_flushed(store, doc_ids):
+    if store is course_store:
+        for doc_id in doc_ids:
+            invalidate_course_doc(doc_id)
+
+
+cache_writes = (
+    WriteBehindQueue(on_written=_on_cache_writes_flushed)
+    if WRITE_BEHIND_ENABLED and course_store is not None else None
+)
+if cache_writes is not None:
+    atexit.register(cache_writes.close)
+
+# ----------------------------
+# Study Plan Precompute
+# ----------------------------
+# With STUDY_PLAN_PRECOMPUTE, a cold extraction also queues study-plan
+# generation for the course name the upload page will ask for, so the later
+# /generate_study_plan call is a cache hit. A small dedicated pool and a cap on
+# pending work keep speculative calls from competing with foreground requests.
+STUDY_PLAN_PRECOMPUTE = os.getenv("STUDY_PLAN_PRECOMPUTE", "false").lower() == "true"
+STUDY_PLAN_PRECOMPUTE_WORKERS = int(os.getenv("STUDY_PLAN_PRECOMPUTE_WORKERS", "1"))
+STUDY_PLAN_PRECOMPUTE_MAX_PENDING = int(os.getenv("STUDY_PLAN_PRECOMPUTE_MAX_PENDING", "8"))
+
+study_plan_flight = SingleFlight()
+# Bump whenever the study plan prompt changes (keys the study plan cache)
+STUDY_PLAN_PROMPT_VERSION = "1"
+study_plan_cache = StudyPlanCache(study_plan_store, writer=cache_writes) if study_plan_store is not None else None
+_study_plan_pool = ThreadPoolExecutor(max_workers=STUDY_PLAN_PRECOMPUTE_WORKERS, thread_name_prefix="study-plan")
+_study_plan_slots = BoundedSemaphore(STUDY_PLAN_PRECOMPUTE_MAX_PENDING)
+
+# In-process L1 cache of course documents in front of course_store.get
+course_doc_cache = (
+    DocumentCache(course_store)
+    if COURSE_CACHE_L1_ENABLED and course_store is not None else None
+)
+
+# "Find classmates" opt-ins, one record per (file hash, handle)
+discord_optins = DiscordOptIns(optin_store) if optin_store is not None else None
+
+# Local disk cache of extracted page texts, keyed by PDF hash + extractor version
+page_text_cache = (
+    PageTextCache(TEXT_CACHE_DIR, TEXT_CACHE_MAX_BYTES, EXTRACTOR_VERSION)
+    if TEXT_CACHE_ENABLED else None
+)
 
 
 # ----------------------------
 # PDF Extraction
 # ----------------------------
-def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
+def extract_text_from_pdf_bytes(pdf_bytes, file_hash: str = None) -> str:
+    # Accepts raw bytes or a spooled upload path. Long documents are split
+    # across a process pool (see PDF_EXTRACT_WORKERS and PDF_PARALLEL_MIN_PAGES);
+    # short ones stay in the request thread.
+    return join_page_texts(extract_pages_from_pdf(pdf_bytes, file_hash))
+
+
+def extract_pages_from_pdf(pdf_bytes, file_hash: str = None) -> list:
+    """extract_text_from_pdf_bytes() without the final join (empty if unreadable)."""
+    cached_pages = _get_cached_page_texts(file_hash)
+    if cached_pages is not None:
+        return cached_pages
+
     try:
-        with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
-            texts = []
-            for page in pdf.pages:
-                t = page.extract_text()
-                if t:
-                    texts.append(t)
-            return "\n\n".join(texts)
+        pages = extract_page_texts(pdf_bytes)
     except Exception:
-        return ""
+        return []
+    _cache_page_texts(file_hash, pages)
+    return pages
+
+
+def _get_cached_page_texts(file_hash: str):
+    if page_text_cache is None or not file_hash:
+        return None
+    pages = page_text_cache.get(file_hash)
+    if pages is not None:
+        print(f"Page text cache hit (hash: {file_hash[:8]}...)")
+    return pages
+
+
+def _cache_page_texts(file_hash: str, pages: list):
+    if page_text_cache is not None and file_hash:
+        page_text_cache.put(file_hash, pages)
+
+
+def _iter_and_cache_page_texts(pdf_bytes, file_hash: str = None):
+    # Only a fully read document is cached; an early stop leaves no entry.
+    collected = []
+    for page_text in iter_page_texts(pdf_bytes):
+        collected.append(page_text)
+        yield page_text
+    _cache_page_texts(file_hash, collected)
+
+
+def iter_pdf_page_texts(pdf_bytes, seen: dict = None, file_hash: str = None):
+    """Stream page texts, stopping quietly if the PDF turns out to be unreadable.
+
+    If `seen` is given, seen["text"] is set once a page with text is yielded.
+    """
+    cached_pages = _get_cached_page_texts(file_hash)
+    if cached_pages is not None:
+        pages = iter(cached_pages)
+    else:
+        pages = _iter_and_cache_page_texts(pdf_bytes, file_hash)
+    if PDF_EARLY_STOP:
+        pages = stop_after_schedule_section(pages)
+    try:
+        for page_text in pages:
+            if seen is not None and page_text.strip():
+                seen["text"] = True
+            yield page_text
+    except Exception as e:
+        print(f"PDF page extraction stopped: {e}")
+    finally:
+        if hasattr(pages, "close"):
+            pages.close()
+
+
+def extract_items_from_pdf(pdf_bytes, file_hash: str = None, progress=None):
+    """Extract text and parse events.
+
+    Returns None when the PDF has no text, otherwise a dict with
+    "assignments", "text_key" (None when text was only streamed) and
+    "study_plans" (non-empty only for a text-level cache hit). `progress`,
+    if given, is called with a stage name as work advances.
+    """
+    if progress is not None:
+        progress("extracting_text")
+    if PDF_STREAMING_EXTRACTION:
+        seen = {"text": False}
+        if USE_LOCAL_FALLBACK:
+            items = parse_events_local(iter_pdf_page_texts(pdf_bytes, seen, file_hash))
+            if not seen["text"]:
+                return None
+            return {
+                "assignments": normalize_extracted_assignments(items),
+                "text_key": None,
+                "fingerprint": None,
+                "changes": None,
+                "study_plans": {},
+                "needs_upgrade": False,
+            }
+        pages = list(iter_pdf_page_texts(pdf_bytes, seen, file_hash))
+    else:
+        pages = extract_pages_from_pdf(pdf_bytes, file_hash)
+    text = join_page_texts(pages)
+
+    if not text.strip():
+        return None
+
+    # Second-level cache: a re-saved copy of a known syllabus has new bytes
+    # but the same text, so look it up before paying for extraction again.
+    text_key = compute_text_cache_key(text)
+    fingerprint = compute_text_fingerprint(text, pages)
+    cached, revision_base = find_cached_extraction_by_text(text_key, fingerprint)
+    if cached is not None:
+        return {
+            "assignments": stored_assignments(cached),
+            "text_key": text_key,
+            "fingerprint": fingerprint,
+            "changes": None,
+            "study_plans": cached.get("study_plans", {}),
+            "needs_upgrade": False,
+        }
+
+    if progress is not None:
+        progress("extracting_events")
+    plan = plan_revision(revision_base, pages, fingerprint)
+    if plan is not None:
+        # Revised syllabus: only its changed pages go to the model.
+        items, needs_upgrade = [], False
+        if plan["changed_pages"]:
+            items, needs_upgrade = extract_with_llm_or_fallback(revision_prompt_text(text, plan["changed_pages"]))
+        assignments = merge_revision_events(plan["kept"], normalize_extracted_assignments(items))
+    elif USE_LOCAL_FALLBACK:
+        assignments = normalize_extracted_assignments(parse_events_local(text))
+        needs_upgrade = False
+    else:
+        items, needs_upgrade = extract_with_llm_or_fallback(text)
+        assignments = normalize_extracted_assignments(items)
+    return {
+        "assignments": assignments,
+        # Degraded results are not reachable through the text-level cache
+        "text_key": None if needs_upgrade else text_key,
+        "fingerprint": None if needs_upgrade else fingerprint,
+        "changes": revision_changes(revision_base, assignments, plan),
+        "study_plans": {},
+        "needs_upgrade": needs_upgrade,
+    }
+
+
+def compute_text_cache_key(text: str) -> str:
+    """Hash of whitespace-normalized text + extraction model + prompt version."""
+    normalized = " ".join(text.split())
+    model = "local-parser" if USE_LOCAL_FALLBACK else OPENROUTER_MODEL
+    payload = f"{EXTRACTION_PROMPT_VERSION}\0{model}\0{normalized}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def compute_text_fingerprint(text: str, pages: list):
+    """Near-duplicate lookup fields (and the page index) for a text, or None when the lookup is off."""
+    if not NEAR_DUPLICATE_ENABLED:
+        return None
+    model = "local-parser" if USE_LOCAL_FALLBACK else OPENROUTER_MODEL
+    # Yearless dates resolve against the term, so a later offering of the
+    # same syllabus must not match; without a mention, the upload year stands in.
+    term = find_term_mention(text)
+    term_key = f"{term.season}-{term.year}" if term else f"year-{datetime.utcnow().year}"
+    namespace = hashlib.sha256(
+        f"{EXTRACTION_PROMPT_VERSION}\0{model}\0{term_key}".encode("utf-8")
+    ).hexdigest()[:8]
+    fingerprint = text_fingerprint(text, namespace)
+    if INCREMENTAL_EXTRACTION_ENABLED:
+        fingerprint["page_index"] = page_index(pages)
+    return fingerprint
+
+
+def find_cached_extraction_by_text(text_key: str, fingerprint: dict = None):
+    """
+    Look up a cached extraction for a text that missed the PDF hash cache.
+
+    Returns:
+        (cached, revision_base): `cached` is a reusable extraction of the same
+        text, or of a near-duplicate with the same date lines. Otherwise
+        `revision_base` is the most similar near-duplicate whose dates differ
+        (an earlier version of a revised syllabus), if any.
+    """
+    if course_store is None:
+        return None, None
+    try:
+        cached = course_store.find_one({"text_key": text_key, "needs_upgrade": {"$ne": True}})
+        if cached and "assignments" in cached:
+            print(f"Text cache hit (text key: {text_key[:8]}...)")
+            return cached, None
+        if fingerprint is not None:
+            return find_near_duplicate_extraction(fingerprint)
+    except Exception as e:
+        print(f"Text cache lookup failed: {e}")
+    return None, None
+
+
+def find_near_duplicate_extraction(fingerprint: dict):
+    """Most similar cached extraction above NEAR_DUPLICATE_THRESHOLD; returns (cached, revision_base)."""
+    if not fingerprint["lsh_bands"]:
+        # Too short to compare reliably.
+        return None, None
+    candidates = course_store.iter_documents(
+        {"lsh_bands": {"$in": fingerprint["lsh_bands"]}, "needs_upgrade": {"$ne": True}},
+        ("minhash", "date_lines"),
+    )
+    matches = []
+    for candidate in itertools.islice(candidates, NEAR_DUPLICATE_MAX_CANDIDATES):
+        similarity = estimate_similarity(fingerprint["minhash"], candidate.get("minhash") or [])
+        if similarity >= NEAR_DUPLICATE_THRESHOLD:
+            changed = diff_date_lines(fingerprint["date_lines"], candidate.get("date_lines") or [])
+            matches.append((changed == 0, similarity, candidate["_id"], changed))
+    if not matches:
+        return None, None
+    same_dates, best_similarity, best_id, changed = max(matches)
+
+    cached = find_course_doc(best_id, ("assignments", "study_plans", "schema_version", "page_index"))
+    if not cached or "assignments" not in cached:
+        return None, None
+    if not same_dates:
+        # Same syllabus, different schedule: never serve stale deadlines,
+        # but the earlier version can seed an incremental extraction.
+        print(f"Near-duplicate of {best_id[:8]}... ({best_similarity:.2f}) differs in {changed} date lines")
+        return None, cached
+    print(f"Near-duplicate cache hit ({best_similarity:.2f} similar to {best_id[:8]}...)")
+    return cached, None
+
+
+def plan_revision(revision_base, pages: list, fingerprint: dict):
+    """Incremental extraction plan against an earlier version of the syllabus, or None."""
+    if revision_base is None or not fingerprint or "page_index" not in fingerprint:
+        return None
+    if USE_LOCAL_FALLBACK or not INCREMENTAL_EXTRACTION_ENABLED:
+        # The local parser re-reads a whole document in milliseconds.
+        return None
+    plan = plan_incremental(
+        stored_assignments(revision_base), revision_base.get("page_index"), pages, fingerprint["page_index"]
+    )
+    if plan is not None:
+        print(f"Revision of {revision_base['_id'][:8]}...: re-extracting {plan['changed']} of {plan['total']} pages")
+    return plan
+
+
+def revision_prompt_text(text: str, changed_pages: list) -> str:
+    # Changed pages alone may not name the term, which dates resolve against.
+    term = find_term_mention(text)
+    hint = f"Term: {term.season.title()} {term.year}\n\n" if term else ""
+    return hint + join_page_texts(changed_pages)
+
+
+def merge_revision_events(kept: list, extracted: list) -> list:
+    merged = merge_extracted_events([kept, extracted])
+    return sorted(merged, key=lambda event: event.get("due_date") or "9999-99-99")
+
+
+def revision_changes(revision_base, assignments: list, plan):
+    """What changed relative to the earlier version, for the API response (None without one)."""
+    if revision_base is None:
+        return None
+    # The earlier version's PDF hash is deliberately left out: file hashes
+    # are the only capability guarding /jobs and the Discord endpoints.
+    return {
+        "incremental": plan is not None,
+        **diff_events(stored_assignments(revision_base), assignments),
+    }
 
 
 # ----------------------------
 # Local Regex Fallback
 # ----------------------------
-def parse_events_local(text: str) -> list:
-    events = []
-    current_year = datetime.now().year
-    lines = text.split('\n')
-
-    for line in lines:
-        match = re.search(
-            r'(.+?)\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{1,2}',
-            line,
-            re.IGNORECASE
-        )
+# Grading/evaluation headings are deliberately absent: those sections usually
+# come before the dated schedule and must not arm the early stop.
+SCHEDULE_HEADING_RE = re.compile(
+    r'^\s*(?:course\s+)?(?:schedule|calendar|important\s+dates|deliverables|due\s+dates)\b',
+    re.IGNORECASE | re.MULTILINE
+)
+TITLE_STRIP_CHARS = " \t-–—:,(|"
 
-        if match:
-            title = match.group(1).strip()
-            date_match = re.search(
-                r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{1,2}',
-                line,
-                re.IGNORECASE
-            )
 
-            if date_match:
-                parsed = parse_flexible_date(date_match.group(0), current_year)
-                if parsed:
-                    events.append({
-                        "title": title,
-                        "due_date": parsed,
-                        "type": "assignment",
-                        "accuracy": 100.0,
-                        "is_low_accuracy": False,
-                    })
+def stop_after_schedule_section(pages):
+    """Yield page texts until the schedule section has been read.
 
-    return events
+    The stop is armed once a schedule-style heading has been followed by at
+    least one dated line; the first later page without any dates then ends
+    the stream, so trailing policy pages are never parsed.
+    """
+    in_schedule = False
+    armed = False
+    try:
+        for page_text in pages:
+            heading = SCHEDULE_HEADING_RE.search(page_text)
+            if armed and heading is None and not DATE_TOKEN_RE.search(page_text):
+                return
+            yield page_text
+            if heading is not None:
+                in_schedule = True
+                # Only dates after the heading count on the heading's own page.
+                armed = armed or DATE_TOKEN_RE.search(page_text, heading.end()) is not None
+            elif in_schedule:
+                armed = armed or DATE_TOKEN_RE.search(page_text) is not None
+    finally:
+        if hasattr(pages, "close"):
+            pages.close()
+
+
+def parse_events_local(text, today=None) -> list:
+    """Parse "<title> <date>" lines from a string or an iterable of page texts.
+
+    The academic term is taken from the first explicit mention in the text
+    ("Winter 2026"), else the first page's academic-year span ("2025-26"),
+    otherwise inferred once from the months of all dates found, and yearless
+    dates are resolved against it. Repeated (title, date) lines are returned
+    once, so every caller (sync, streamed, fallback) gets the same list.
+    """
+    pages = [text] if isinstance(text, str) else text
+    term_hint = span_hint = None
+    candidates = []
+
+    for page_text in pages:
+        if term_hint is None:
+            term_hint = find_term_mention(page_text, allow_spans=False)
+            if span_hint is None:
+                span_hint = find_term_mention(page_text)
+        for line in page_text.split('\n'):
+            tokens = find_dates(line)
+            if not tokens:
+                continue
+
+            token = tokens[0]
+            title = line[:token.start].strip(TITLE_STRIP_CHARS)
+            if not title:
+                title = line[token.end:].strip(TITLE_STRIP_CHARS)
+            if title:
+                candidates.append((title, token))
+
+    term = term_hint or span_hint or infer_term((token.end_month for _, token in candidates), today)
+
+    events = []
+    for title, token in candidates:
+        parsed = resolve_date(token.text, term)
+        if parsed:
+            events.append({
+                "title": title,
+                "due_date": parsed,
+                "type": "assignment",
+                "accuracy": 100.0,
+                "is_low_accuracy": False,
+            })
+
+    return merge_extracted_events([events])
 
 
 def parse_flexible_date(date_str: str, default_year: int = None) -> str:
     if default_year is None:
         default_year = datetime.now().year
-
-    date_str = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', date_str)
-
-    try:
-        dt = datetime.strptime(date_str, "%b %d")
-        dt = dt.replace(year=default_year)
-        return dt.date().isoformat()
-    except Exception:
-        return None
+    return parse_date_string(date_str, default_year)
 
 
 def _parse_accuracy_value(raw_accuracy) -> float:
@@ -199,9 +648,87 @@ def build_discord_avatar_url(user_id: str, avatar_hash: str) -> str:
 # ----------------------------
 # OpenRouter (Gemini) Call
 # ----------------------------
-def call_openrouter_to_extract_assignments(text: str) -> list:
+class LLMUnavailableError(RuntimeError):
+    """OpenRouter could not answer in time (transport error, HTTP error or budget exceeded)."""
 
-    prompt_system = """
+
+def extract_with_llm_or_fallback(text: str):
+    """Return (items, needs_upgrade), degrading to the local parser when needed."""
+    if not llm_breaker.allow_request():
+        print("OpenRouter circuit open; using local parser")
+        return local_fallback_events(text), True
+
+    try:
+        items = call_openrouter_to_extract_assignments(text, LLM_LATENCY_BUDGET_SECONDS)
+    except LLMUnavailableError as e:
+        llm_breaker.record_failure()
+        print(f"OpenRouter unavailable, using local parser: {e}")
+        return local_fallback_events(text), True
+    except Exception:
+        # The model answered (just badly), so the provider itself is healthy.
+        llm_breaker.record_success()
+        raise
+    llm_breaker.record_success()
+    return items, False
+
+
+def local_fallback_events(text: str) -> list:
+    events = parse_events_local(text)
+    for event in events:
+        event["accuracy"] = LOCAL_FALLBACK_ACCURACY
+    return events
+
+
+def llm_upgrade_available() -> bool:
+    return not USE_LOCAL_FALLBACK and llm_breaker.state == STATE_CLOSED
+
+
+def call_openrouter_to_extract_assignments(text: str, budget_seconds: float = None) -> list:
+    """Extract events, fanning long documents out as concurrent chunk requests.
+
+    Chunks overlap so boundary lines are seen whole; results are merged and
+    deduplicated by (normalized title, date), keeping the highest accuracy.
+    With `budget_seconds`, LLMUnavailableError is raised once the whole
+    extraction runs past that many seconds.
+    """
+    deadline = time.monotonic() + budget_seconds if budget_seconds else None
+
+    if LLM_PREFILTER:
+        text = prefilter_prompt_text(text)
+
+    if OPENROUTER_CHUNKED_EXTRACTION:
+        chunks = split_text_into_chunks(text, OPENROUTER_CHUNK_CHARS, OPENROUTER_CHUNK_OVERLAP)
+    else:
+        chunks = [text]
+    if len(chunks) == 1 and deadline is None:
+        return _call_openrouter_extract_chunk(text, deadline)
+
+    # Even a single chunk runs on the pool: the read timeout alone does not
+    # bound a response that keeps trickling in, the wait below does.
+    if len(chunks) > 1:
+        print(f"Extracting {len(chunks)} chunks concurrently ({len(text)} chars)")
+    futures = [_llm_chunk_pool.submit(_call_openrouter_extract_chunk, chunk, deadline) for chunk in chunks]
+    timeout = max(0.0, deadline - time.monotonic()) if deadline else None
+    _done, pending = wait(futures, timeout=timeout)
+    if pending:
+        for future in pending:
+            future.cancel()
+        raise LLMUnavailableError(f"{len(pending)} of {len(chunks)} chunks exceeded the latency budget")
+    return merge_extracted_events([future.result() for future in futures])
+
+
+def prefilter_prompt_text(text: str) -> str:
+    """Drop dateless prose before prompting and log the estimated token savings."""
+    filtered, stats = filter_date_lines(text, LLM_PREFILTER_CONTEXT_LINES)
+    saved = stats.original_tokens - stats.filtered_tokens
+    print(
+        f"Prompt pre-filter kept {stats.kept_lines}/{stats.total_lines} lines, "
+        f"saved ~{saved} tokens ({stats.original_tokens} -> {stats.filtered_tokens})"
+    )
+    return filtered
+
+
+EXTRACTION_SYSTEM_PROMPT = """
 You are replacing a production LLM.
 
 CRITICAL REQUIREMENTS:
@@ -234,7 +761,16 @@ Rules:
 - Return [] if nothing found.
 """
 
-    prompt_user = f"""
+
+def build_extraction_messages(text: str) -> list:
+    return [
+        {"role": "system", "content": EXTRACTION_SYSTEM_PROMPT.strip()},
+        {"role": "user", "content": _extraction_user_prompt(text).strip()}
+    ]
+
+
+def _extraction_user_prompt(text: str) -> str:
+    return f"""
 Extract all course events (assignments, tests, quizzes, exams, projects, presentations, deadlines).
 
 Normalize all dates to YYYY-MM-DD.
@@ -243,33 +779,47 @@ Text:
 {text}
 """
 
-    try:
-        response = requests.post(
-            OPENROUTER_URL,
-            headers={
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "http://localhost",
-                "X-Title": "Assignment Extractor"
-            },
-            json={
-                "model": OPENROUTER_MODEL,
-                "messages": [
-                    {"role": "system", "content": prompt_system.strip()},
-                    {"role": "user", "content": prompt_user.strip()}
-                ],
-                "temperature": 0,
-                "max_tokens": 1000
-            },
-            timeout=60
-        )
 
-        response.raise_for_status()
+def _post_extraction_request(text: str, deadline: float = None, stream: bool = False):
+    read_timeout = None
+    if deadline is not None:
+        read_timeout = deadline - time.monotonic()
+        if read_timeout <= 0:
+            raise LLMUnavailableError("latency budget exhausted before request")
+
+    payload = {
+        "model": OPENROUTER_MODEL,
+        "messages": build_extraction_messages(text),
+        "temperature": 0,
+        "max_tokens": 1000
+    }
+    if stream:
+        payload["stream"] = True
+
+    response = get_session("openrouter").post(
+        OPENROUTER_URL,
+        headers={
+            "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "http://localhost",
+            "X-Title": "Assignment Extractor"
+        },
+        json=payload,
+        stream=stream,
+        timeout=http_timeout(read_timeout)
+    )
+    response.raise_for_status()
+    return response
+
+
+def _call_openrouter_extract_chunk(text: str, deadline: float = None) -> list:
+    try:
+        response = _post_extraction_request(text, deadline)
         data = response.json()
         content = data["choices"][0]["message"]["content"]
 
     except Exception as e:
-        raise RuntimeError(f"OpenRouter request failed: {e}")
+        raise LLMUnavailableError(f"OpenRouter request failed: {e}")
 
     # Parse JSON from response
     try:
@@ -289,9 +839,207 @@ Text:
         raise RuntimeError(f"Model did not return valid JSON.\nOutput:\n{content}")
 
 
+def stream_openrouter_extraction(text: str, budget_seconds: float = None):
+    """Yield normalized events as the model emits them.
+
+    Follows call_openrouter_to_extract_assignments() (pre-filter, concurrent
+    chunks, latency budget) but forwards each event as soon as its JSON
+    object is complete. Events repeated across chunk overlaps may be yielded
+    more than once; merge_extracted_events() settles the final list.
+    """
+    deadline = time.monotonic() + budget_seconds if budget_seconds else None
+
+    if LLM_PREFILTER:
+        text = prefilter_prompt_text(text)
+
+    chunks = [text]
+    if OPENROUTER_CHUNKED_EXTRACTION:
+        chunks = split_text_into_chunks(text, OPENROUTER_CHUNK_CHARS, OPENROUTER_CHUNK_OVERLAP)
+    if len(chunks) == 1:
+        yield from _stream_openrouter_extract_chunk(chunks[0], deadline)
+        return
+
+    print(f"Streaming {len(chunks)} chunks concurrently ({len(text)} chars)")
+    events = queue.Queue()
+
+    def pump(chunk):
+        try:
+            for item in _stream_openrouter_extract_chunk(chunk, deadline):
+                events.put(("event", item))
+        except Exception as e:
+            events.put(("error", e))
+            return
+        events.put(("done", None))
+
+    futures = [_llm_chunk_pool.submit(pump, chunk) for chunk in chunks]
+    remaining = len(chunks)
+    while remaining:
+        timeout = max(0.0, deadline - time.monotonic()) if deadline else None
+        try:
+            kind, value = events.get(timeout=timeout)
+        except queue.Empty:
+            for future in futures:
+                future.cancel()
+            raise LLMUnavailableError(f"{remaining} of {len(chunks)} chunks exceeded the latency budget")
+        if kind == "event":
+            yield value
+        elif kind == "error":
+            raise value
+        else:
+            remaining -= 1
+
+
+def _stream_openrouter_extract_chunk(text: str, deadline: float = None):
+    parser = JsonArrayStreamParser()
+    try:
+        response = _post_extraction_request(text, deadline, stream=True)
+    except LLMUnavailableError:
+        raise
+    except Exception as e:
+        raise LLMUnavailableError(f"OpenRouter request failed: {e}")
+
+    with response:
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if deadline is not None and time.monotonic() > deadline:
+                    raise LLMUnavailableError("latency budget exhausted while streaming")
+                # SSE: "data: {...}" events, ": comment" keep-alives, "data: [DONE]" last
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta") or {}
+                for raw_item in parser.feed(delta.get("content") or ""):
+                    yield from normalize_extracted_assignments([raw_item])
+                if parser.finished:
+                    break
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            raise LLMUnavailableError(f"OpenRouter stream failed: {e}")
+
+    if not parser.started:
+        raise RuntimeError("Model did not return a JSON array")
+
+
 # ----------------------------
 # Study Plan Generation
 # ----------------------------
+COURSE_CODE_RES = (
+    re.compile(r"([A-Z]{2,4}\s*\d{3,4}[A-Z]?)", re.IGNORECASE),  # EECS3101, EECS 3101, CS101
+    re.compile(r"([A-Z]{2,4}-\d{3,4}[A-Z]?)", re.IGNORECASE),     # CS-101, MATH-201
+)
+
+
+def default_course_name(filename: str) -> str:
+    """Course name the upload page groups a file's assignments under.
+
+    Mirrors extractCourseCode() in static/js/index.js (falling back to
+    "General"), so precomputed plans land under the key the client requests.
+    """
+    name = re.sub(r"\.pdf$", "", filename or "", flags=re.IGNORECASE)
+    for pattern in COURSE_CODE_RES:
+        match = pattern.search(name)
+        if match:
+            return re.sub(r"([A-Z]+)(\d)", r"\1 \2", match.group(1), count=1).upper()
+    first_word = re.split(r"[_\-\s]+", name)[0] if name else ""
+    if first_word and len(first_word) <= 15:
+        return first_word
+    return "General"
+
+
+def generate_study_plan(assignments: list, course_name: str) -> dict:
+    if USE_LOCAL_FALLBACK:
+        # Simple fallback: return a basic study plan structure
+        return {
+            "overview": f"Study plan for {course_name}",
+            "weekly_schedule": [
+                "Review syllabus and course materials",
+                "Complete assigned readings",
+                "Work on assignments and projects",
+                "Prepare for exams and quizzes"
+            ],
+            "study_tips": [
+                "Start assignments early to avoid last-minute rush",
+                "Form a study group with classmates",
+                "Review notes regularly, not just before the exam",
+                "Attend office hours if you need clarification",
+                "Take care of your physical and mental health"
+            ],
+            "resource_recommendations": "Take advantage of tutoring services, online resources, and library materials available at your institution."
+        }
+    return call_openrouter_to_generate_study_plan(assignments, course_name)
+
+
+def generate_cached_study_plan(assignments: list, course_name: str, file_hash: str = None) -> dict:
+    """Return the study plan for an assignment list, generating it at most once.
+
+    Plans come from the content-addressed study plan cache when possible;
+    concurrent callers for the same key (such as a speculative precompute and
+    the user's own request) share one LLM call. With `file_hash`, the plan is
+    also saved under study_plans.<course_name> in that PDF's cache document.
+    """
+    model = "local-template" if USE_LOCAL_FALLBACK else OPENROUTER_MODEL
+    key = study_plan_cache_key(assignments, course_name, model, STUDY_PLAN_PROMPT_VERSION)
+
+    def lookup_or_generate():
+        study_plan = study_plan_cache.get(key) if study_plan_cache is not None else None
+        if study_plan is not None:
+            print(f"Study plan cache hit for {course_name} (key: {key[:8]}...)")
+            return study_plan
+        study_plan = generate_study_plan(assignments, course_name)
+        if study_plan_cache is not None:
+            study_plan_cache.put(key, study_plan, course_name)
+        return study_plan
+
+    study_plan, shared = study_plan_flight.do(key, lookup_or_generate)
+    if shared:
+        print(f"Joined in-flight study plan for {course_name} (key: {key[:8]}...)")
+    if file_hash:
+        save_cached_study_plan(file_hash, course_name, study_plan)
+    return study_plan
+
+
+def save_cached_study_plan(file_hash: str, course_name: str, study_plan: dict):
+    if course_store is None:
+        return
+    if cache_writes is not None:
+        cache_writes.submit(course_store, ("update", file_hash, {f"study_plans.{course_name}": study_plan}, (), None, False))
+        return
+    try:
+        course_store.update_fields(file_hash, {f"study_plans.{course_name}": study_plan})
+        invalidate_course_doc(file_hash)
+        print(f"Cached study plan for {course_name} (hash: {file_hash[:8]}...)")
+    except Exception as e:
+        print(f"Study plan cache save failed: {e}")
+
+
+def schedule_study_plan_precompute(file_hash: str, filename: str, result: dict):
+    """Queue speculative study-plan generation after a cold extraction."""
+    if not STUDY_PLAN_PRECOMPUTE or USE_LOCAL_FALLBACK or course_store is None:
+        return
+    if result["needs_upgrade"] or not result["assignments"] or llm_breaker.state != STATE_CLOSED:
+        return
+    course_name = default_course_name(filename)
+    if course_name in result["study_plans"]:
+        return
+    if not _study_plan_slots.acquire(blocking=False):
+        print(f"Study plan precompute queue full; skipping {course_name}")
+        return
+    _study_plan_pool.submit(_precompute_study_plan, file_hash, result["assignments"], course_name)
+
+
+def _precompute_study_plan(file_hash: str, assignments: list, course_name: str):
+    try:
+        generate_cached_study_plan(assignments, course_name, file_hash)
+        print(f"Precomputed study plan for {course_name} (hash: {file_hash[:8]}...)")
+    except Exception as e:
+        print(f"Study plan precompute failed for {course_name}: {e}")
+    finally:
+        _study_plan_slots.release()
+
+
 def call_openrouter_to_generate_study_plan(assignments: list, course_name: str) -> dict:
     """Generate a personalized study plan based on assignments."""
     
@@ -330,7 +1078,7 @@ Generate practical, actionable guidance that helps the student succeed in this c
 """
 
     try:
-        response = requests.post(
+        response = get_session("openrouter").post(
             OPENROUTER_URL,
             headers={
                 "Authorization": f"Bearer {OPENROUTER_API_KEY}",
@@ -347,7 +1095,7 @@ Generate practical, actionable guidance that helps the student succeed in this c
                 "temperature": 0.7,
                 "max_tokens": 2000
             },
-            timeout=60
+            timeout=http_timeout()
         )
 
         response.raise_for_status()
@@ -504,9 +1252,480 @@ def upload_assignments_to_google_calendar(assignments: list, course_name: str, c
         }
 
 
+# ----------------------------
+# Extraction Cache
+# ----------------------------
+def find_course_doc(file_hash: str, fields=None, refresh: bool = False):
+    """course_store.get by hash, served from the L1 cache when enabled."""
+    if course_doc_cache is not None:
+        return course_doc_cache.get(file_hash, fields, refresh=refresh)
+    return course_store.get(file_hash, fields)
+
+
+def invalidate_course_doc(file_hash: str):
+    """Call after every write to a course document."""
+    if course_doc_cache is not None:
+        course_doc_cache.invalidate(file_hash)
+
+
+def _migrate_cache_documents():
+    try:
+        migrate_cache_documents(course_store, CACHE_SCHEMA_VERSION, normalize_extracted_assignments)
+        if discord_optins is not None:
+            migrate_shared_discords(course_store, discord_optins)
+    except Exception as e:
+        print(f"Cache migration failed: {e}")
+    if course_doc_cache is not None:
+        # Entries read before the migration still hold old-version documents.
+        course_doc_cache.clear()
+
+
+def import_legacy_optins(file_hash: str):
+    """Move a course document's legacy `shared_discords` array into opt-in records."""
+    if course_store is None:
+        return
+    doc = find_course_doc(file_hash, ("shared_discords",))
+    if not doc or "shared_discords" not in doc:
+        return
+    discord_optins.import_legacy(file_hash, doc["shared_discords"])
+    course_store.update_fields(file_hash, unset_fields=("shared_discords",))
+    invalidate_course_doc(file_hash)
+
+
+def get_cached_extraction(file_hash: str, filename: str = None):
+    """Return {"assignments", "study_plans"} for a cached PDF hash, or None."""
+    if course_store is None:
+        return None
+    try:
+        cached = find_course_doc(
+            file_hash, ("assignments", "study_plans", "needs_upgrade", "created_at", "schema_version")
+        )
+        if not cached or "assignments" not in cached:
+            return None
+        if cached.get("needs_upgrade") and llm_upgrade_available():
+            # Local-parser fallback from a provider incident; re-extract now.
+            print(f"Upgrading degraded cache entry for {filename} (hash: {file_hash[:8]}...)")
+            return None
+
+        if cached.get("schema_version") == CACHE_SCHEMA_VERSION:
+            # Stored already normalized: no CPU pass and no write on the hot path.
+            cached_assignments = cached["assignments"]
+        else:
+            cached_assignments = _normalize_legacy_cache_document(file_hash, cached)
+        print(f"Cache hit for {filename} (hash: {file_hash[:8]}...)")
+        return {
+            "assignments": cached_assignments,
+            "study_plans": cached.get("study_plans", {}),
+            "needs_upgrade": bool(cached.get("needs_upgrade")),
+        }
+    except Exception as e:
+        print(f"Cache lookup failed: {e}")
+        return None
+
+
+def stored_assignments(doc: dict) -> list:
+    """A cache document's assignments, normalized unless already stored that way."""
+    if doc.get("schema_version") == CACHE_SCHEMA_VERSION:
+        return doc["assignments"]
+    return normalize_extracted_assignments(doc["assignments"])
+
+
+def _normalize_legacy_cache_document(file_hash: str, cached: dict) -> list:
+    # Documents the startup migration has not reached yet are upgraded in place.
+    cached_assignments = normalize_extracted_assignments(cached["assignments"])
+    update_fields = {"schema_version": CACHE_SCHEMA_VERSION}
+    if "created_at" not in cached:
+        update_fields["created_at"] = datetime.utcnow()
+    if cached_assignments != cached["assignments"]:
+        update_fields["assignments"] = cached_assignments
+    course_store.update_fields(file_hash, update_fields)
+    invalidate_course_doc(file_hash)
+    return cached_assignments
+
+
+def _upgrade_fields(result: dict) -> dict:
+    update_fields = {"assignments": result["assignments"], "schema_version": CACHE_SCHEMA_VERSION}
+    if result["text_key"]:
+        update_fields["text_key"] = result["text_key"]
+    if result["fingerprint"]:
+        update_fields.update(result["fingerprint"])
+    return update_fields
+
+
+def _upgrade_cached_extraction(file_hash: str, result: dict) -> bool:
+    updated = course_store.update_fields(
+        file_hash, _upgrade_fields(result), unset_fields=("needs_upgrade",), match={"needs_upgrade": True}
+    )
+    invalidate_course_doc(file_hash)
+    return updated
+
+
+def run_cold_extraction(pdf_source, file_hash: str, filename: str, progress=None):
+    """Extract assignments from a PDF and cache them under its hash.
+
+    Returns the extract_items_from_pdf() result, or None if the PDF has no text.
+    """
+    result = extract_items_from_pdf(pdf_source, file_hash, progress)
+    if result is None:
+        return None
+
+    if progress is not None:
+        progress("caching")
+    cache_extraction_result(file_hash, filename, result)
+    return result
+
+
+def cache_extraction_result(file_hash: str, filename: str, result: dict):
+    """Insert an extraction result under its PDF hash (upgrading degraded entries)."""
+    if course_store is None:
+        return
+    doc = {
+        "_id": file_hash,
+        "filename": filename,
+        "assignments": result["assignments"],
+        "study_plans": result["study_plans"],
+        "schema_version": CACHE_SCHEMA_VERSION,
+        "created_at": datetime.utcnow()
+    }
+    if result["text_key"]:
+        doc["text_key"] = result["text_key"]
+    if result["fingerprint"]:
+        doc.update(result["fingerprint"])
+    if result["needs_upgrade"]:
+        doc["needs_upgrade"] = True
+
+    if cache_writes is not None:
+        # The insert is a no-op if the document exists; the update then
+        # upgrades it if it was degraded, and matches nothing otherwise.
+        cache_writes.submit(course_store, ("insert", doc))
+        if not result["needs_upgrade"]:
+            cache_writes.submit(course_store, (
+                "update", file_hash, _upgrade_fields(result), ("needs_upgrade",), {"needs_upgrade": True}, False
+            ))
+        print(f"Queued cache write for {filename} (hash: {file_hash[:8]}...)")
+        schedule_study_plan_precompute(file_hash, filename, result)
+        return
+
+    try:
+        if course_store.insert_if_absent(doc):
+            invalidate_course_doc(file_hash)
+            print(f"Cached assignments for {filename} (hash: {file_hash[:8]}...)")
+        elif not result["needs_upgrade"] and _upgrade_cached_extraction(file_hash, result):
+            print(f"Upgraded cached assignments for {filename} (hash: {file_hash[:8]}...)")
+        else:
+            print(f"Cache already exists for {filename} (race condition)")
+            return
+    except Exception as e:
+        print(f"Cache save failed: {e}")
+        return
+    schedule_study_plan_precompute(file_hash, filename, result)
+
+
+def coalesced_cold_extraction(pdf_source, file_hash: str, filename: str, progress=None):
+    """run_cold_extraction(), shared by every concurrent caller for the same hash."""
+    while True:
+        try:
+            result, shared = extraction_flight.do(
+                file_hash, _leased_cold_extraction, pdf_source, file_hash, filename, progress
+            )
+            break
+        except AbandonedCall:
+            # A streaming leader's client went away mid-extraction; take over.
+            continue
+    if shared:
+        print(f"Coalesced concurrent upload of {filename} (hash: {file_hash[:8]}...)")
+    return result
+
+
+def _leased_cold_extraction(pdf_source, file_hash: str, filename: str, progress=None):
+    acquired, cached = _acquire_extraction_lease(file_hash, filename, progress)
+    if cached is not None:
+        return cached
+    try:
+        return run_cold_extraction(pdf_source, file_hash, filename, progress)
+    finally:
+        if acquired:
+            _finish_extraction_lease(file_hash)
+
+
+def _acquire_extraction_lease(file_hash: str, filename: str, progress=None):
+    """Take the cross-process extraction lease for a PDF.
+
+    Returns (acquired, cached); cached is the result another process cached
+    while this one waited on its lease, otherwise None.
+    """
+    if extraction_lease is None:
+        return False, None
+    try:
+        if extraction_lease.acquire(file_hash):
+            return True, None
+        # Another process is extracting this PDF; wait for its cache entry.
+        if progress is not None:
+            progress("waiting_for_peer")
+        cached = extraction_lease.wait(file_hash, lambda: get_cached_extraction(file_hash, filename))
+        if cached is not None:
+            return False, {**cached, "text_key": None, "fingerprint": None, "changes": None}
+        return extraction_lease.acquire(file_hash), None
+    except Exception as e:
+        print(f"Extraction lease unavailable: {e}")
+        return False, None
+
+
+def _finish_extraction_lease(file_hash: str):
+    if cache_writes is not None:
+        # Waiting peers read the cache once the lease is gone, so release
+        # it only after our queued write has landed.
+        cache_writes.call_after_pending(lambda: _release_extraction_lease(file_hash))
+    else:
+        _release_extraction_lease(file_hash)
+
+
+def _release_extraction_lease(file_hash: str):
+    try:
+        extraction_lease.release(file_hash)
+    except Exception as e:
+        # The lease expires on its own.
+        print(f"Extraction lease release failed: {e}")
+
+
+def run_extraction_job(progress, pdf_source, file_hash: str, filename: str) -> dict:
+    """Job body for async extraction; the result mirrors /extract_assignments."""
+    try:
+        result = coalesced_cold_extraction(pdf_source, file_hash, filename, progress)
+    finally:
+        discard_detached(pdf_source)
+    if result is None:
+        raise ValueError("no extractable text")
+    response = {
+        "assignments": result["assignments"],
+        "file_hash": file_hash,
+        "study_plans": result["study_plans"],
+        "needs_upgrade": result["needs_upgrade"],
+    }
+    if result["changes"]:
+        response["changes"] = result["changes"]
+    return response
+
+
+def submit_extraction_job(upload, file_hash: str, filename: str):
+    pdf_source = upload.detach()
+    job = job_runner.submit(
+        file_hash,
+        run_extraction_job,
+        pdf_source,
+        file_hash,
+        filename,
+        meta={"filename": filename},
+        on_skip=lambda: discard_detached(pdf_source),
+    )
+    body = public_job_view(job)
+    body.update({
+        "file_hash": file_hash,
+        "status_url": f"/jobs/{file_hash}",
+        "events_url": f"/jobs/{file_hash}/events",
+    })
+    return jsonify(body), 202
+
+
+def _ndjson(message: dict) -> str:
+    return json.dumps(message) + "\n"
+
+
+def stream_extraction(pdf_source, file_hash: str, filename: str, cached: dict = None):
+    """NDJSON lines for /extract_assignments/stream.
+
+    A "start" line comes first, then one "assignment" line per event as soon
+    as it is extracted (duplicates from chunk overlaps are sent once), then a
+    "done" line carrying the same body /extract_assignments returns, with the
+    final deduplicated list. Failures end the stream with an "error" line.
+    """
+    yield _ndjson({"type": "start", "file_hash": file_hash, "filename": filename})
+    try:
+        if cached is not None:
+            result = cached
+            yield from _assignment_lines(cached["assignments"])
+        else:
+            result = yield from _coalesced_stream_extraction(pdf_source, file_hash, filename)
+    except Exception as e:
+        print(f"Streaming extraction of {filename} failed: {e}")
+        yield _ndjson({"type": "error", "error": str(e)})
+        return
+    finally:
+        if cached is None:
+            discard_detached(pdf_source)
+
+    if result is None:
+        yield _ndjson({"type": "error", "error": "no extractable text"})
+        return
+    done = {
+        "type": "done",
+        "assignments": result["assignments"],
+        "file_hash": file_hash,
+        "study_plans": result["study_plans"],
+        "needs_upgrade": result["needs_upgrade"],
+    }
+    if result.get("changes"):
+        done["changes"] = result["changes"]
+    yield _ndjson(done)
+
+
+def _assignment_lines(assignments: list):
+    for assignment in assignments:
+        yield _ndjson({"type": "assignment", "assignment": assignment})
+
+
+def _coalesced_stream_extraction(pdf_source, file_hash: str, filename: str):
+    # Streaming counterpart of coalesced_cold_extraction(): the leader streams
+    # events as they are extracted, concurrent uploads of the same PDF (in
+    # this process via extraction_flight, in others via the lease) wait for
+    # it and replay its result.
+    while True:
+        call, leader = extraction_flight.join(file_hash)
+        if leader:
+            break
+        try:
+            result = extraction_flight.wait(call)
+        except AbandonedCall:
+            continue
+        print(f"Coalesced concurrent upload of {filename} (hash: {file_hash[:8]}...)")
+        if result is not None:
+            yield from _assignment_lines(result["assignments"])
+        return result
+
+    try:
+        result = yield from _leased_stream_extraction(pdf_source, file_hash, filename)
+    except GeneratorExit:
+        # The leader's client disconnected; a waiter takes over the work.
+        extraction_flight.finish(file_hash, call, error=AbandonedCall(f"stream of {filename} closed"))
+        raise
+    except BaseException as e:
+        extraction_flight.finish(file_hash, call, error=e)
+        raise
+    extraction_flight.finish(file_hash, call, result)
+    return result
+
+
+def _leased_stream_extraction(pdf_source, file_hash: str, filename: str):
+    acquired, cached = _acquire_extraction_lease(file_hash, filename)
+    if cached is not None:
+        yield from _assignment_lines(cached["assignments"])
+        return cached
+    try:
+        return (yield from _stream_cold_extraction(pdf_source, file_hash, filename))
+    finally:
+        if acquired:
+            _finish_extraction_lease(file_hash)
+
+
+def _stream_cold_extraction(pdf_source, file_hash: str, filename: str):
+    # Generator counterpart of run_cold_extraction(); its return value is the
+    # extract_items_from_pdf()-style result (None when the PDF has no text).
+    pages = extract_pages_from_pdf(pdf_source, file_hash)
+    text = join_page_texts(pages)
+    if not text.strip():
+        return None
+
+    text_key = compute_text_cache_key(text)
+    fingerprint = compute_text_fingerprint(text, pages)
+    cached, revision_base = find_cached_extraction_by_text(text_key, fingerprint)
+    if cached is not None:
+        result = {
+            "assignments": stored_assignments(cached),
+            "text_key": text_key,
+            "fingerprint": fingerprint,
+            "changes": None,
+            "study_plans": cached.get("study_plans", {}),
+            "needs_upgrade": False,
+        }
+        yield from _assignment_lines(result["assignments"])
+        # Cache the re-saved copy under its own hash, as run_cold_extraction() does.
+        cache_extraction_result(file_hash, filename, result)
+        return result
+
+    status = {"needs_upgrade": False}
+    kept = []
+    plan = plan_revision(revision_base, pages, fingerprint)
+    if plan is not None:
+        # Events from unchanged pages go out first; only changed pages are streamed.
+        kept = plan["kept"]
+        events = (
+            stream_with_llm_or_fallback(revision_prompt_text(text, plan["changed_pages"]), status)
+            if plan["changed_pages"] else iter(())
+        )
+    elif USE_LOCAL_FALLBACK:
+        events = normalize_extracted_assignments(parse_events_local(text))
+    else:
+        events = stream_with_llm_or_fallback(text, status)
+
+    collected = []
+    sent = set()
+    for event in itertools.chain(kept, events):
+        collected.append(event)
+        key = (normalize_title(event.get("title")), event.get("due_date"))
+        if key not in sent:
+            sent.add(key)
+            yield _ndjson({"type": "assignment", "assignment": event})
+
+    assignments = (
+        merge_revision_events(kept, collected[len(kept):]) if plan is not None
+        else merge_extracted_events([collected])
+    )
+    result = {
+        "assignments": assignments,
+        "text_key": None if status["needs_upgrade"] else text_key,
+        "fingerprint": None if status["needs_upgrade"] else fingerprint,
+        "changes": revision_changes(revision_base, assignments, plan),
+        "study_plans": {},
+        "needs_upgrade": status["needs_upgrade"],
+    }
+    cache_extraction_result(file_hash, filename, result)
+    return result
+
+
+def stream_with_llm_or_fallback(text: str, status: dict):
+    """Streaming extract_with_llm_or_fallback(): yields normalized events.
+
+    status["needs_upgrade"] is set when the local parser had to step in. If
+    the provider fails mid-stream, the local parser's events follow whatever
+    the model had already produced.
+    """
+    if not llm_breaker.allow_request():
+        print("OpenRouter circuit open; using local parser")
+        status["needs_upgrade"] = True
+        yield from normalize_extracted_assignments(local_fallback_events(text))
+        return
+
+    try:
+        yield from stream_openrouter_extraction(text, LLM_LATENCY_BUDGET_SECONDS)
+    except LLMUnavailableError as e:
+        llm_breaker.record_failure()
+        print(f"OpenRouter unavailable, using local parser: {e}")
+        status["needs_upgrade"] = True
+        yield from normalize_extracted_assignments(local_fallback_events(text))
+        return
+    except (Exception, GeneratorExit):
+        # The model was answering (or the client went away mid-answer), so
+        # the provider itself is healthy.
+        llm_breaker.record_success()
+        raise
+    llm_breaker.record_success()
+
+
+if CACHE_MIGRATION_ON_STARTUP and course_store is not None:
+    on_storage_ready(_migrate_cache_documents)
+
+
 # ----------------------------
 # Routes
 # ----------------------------
+@app.errorhandler(ConnectionFailure)
+def database_unavailable(e):
+    # Raised by the Mongo stores while the cluster is unreachable; the
+    # connector keeps retrying in the background.
+    print(f"Database unavailable: {e}")
+    return jsonify({"error": "database unavailable"}), 503
+
+
 @app.route("/", methods=["GET"])
 def home():
     return render_template("/index.html")
@@ -519,68 +1738,97 @@ def extract_assignments():
 
     file = request.files["file"]
     filename = file.filename
-    pdf_bytes = file.read()
-    
-    # Generate SHA256 hash of PDF
-    file_hash = hashlib.sha256(pdf_bytes).hexdigest()
+    upload = read_upload(file)
+
+    # SHA256 hash of PDF (computed while the upload was spooled)
+    file_hash = upload.hexdigest()
     
     # Check cache first (if MongoDB is available)
-    if course_collection is not None:
-        try:
-            cached = course_collection.find_one({"_id": file_hash})
-            if cached and "assignments" in cached:
-                cached_assignments = normalize_extracted_assignments(cached["assignments"])
-                update_fields = {}
-                if "created_at" not in cached:
-                    update_fields["created_at"] = datetime.utcnow()
-                if cached_assignments != cached["assignments"]:
-                    update_fields["assignments"] = cached_assignments
-                if update_fields:
-                    course_collection.update_one(
-                        {"_id": file_hash},
-                        {"$set": update_fields}
-                    )
-                print(f"Cache hit for {filename} (hash: {file_hash[:8]}...)")
-                return jsonify({
-                    "assignments": cached_assignments,
-                    "file_hash": file_hash,
-                    "study_plans": cached.get("study_plans", {})
-                })
-        except Exception as e:
-            print(f"Cache lookup failed: {e}")
-    
-    # Extract text from PDF
-    text = extract_text_from_pdf_bytes(pdf_bytes)
-    if not text.strip():
-        return jsonify({"error": "no extractable text"}), 400
+    cached = get_cached_extraction(file_hash, filename)
+    if cached is not None:
+        return jsonify({
+            "assignments": cached["assignments"],
+            "file_hash": file_hash,
+            "study_plans": cached["study_plans"],
+            "needs_upgrade": cached["needs_upgrade"]
+        })
 
-    # Extract assignments (using fallback or API)
-    if USE_LOCAL_FALLBACK:
-        items = normalize_extracted_assignments(parse_events_local(text))
-    else:
-        items = normalize_extracted_assignments(call_openrouter_to_extract_assignments(text))
-    
-    # Cache the result (if MongoDB is available)
-    if course_collection is not None:
-        try:
-            course_collection.insert_one({
-                "_id": file_hash,
-                "filename": filename,
-                "assignments": items,
-                "study_plans": {},
-                "created_at": datetime.utcnow()
-            })
-            print(f"Cached assignments for {filename} (hash: {file_hash[:8]}...)")
-        except DuplicateKeyError:
-            print(f"Cache already exists for {filename} (race condition)")
-        except Exception as e:
-            print(f"Cache save failed: {e}")
+    # Job mode: acknowledge now, extract on the worker pool
+    if request.args.get("mode") == "async":
+        return submit_extraction_job(upload, file_hash, filename)
 
-    return jsonify({
-        "assignments": items,
+    # Extract text and assignments (using fallback or API), then cache them
+    result = coalesced_cold_extraction(upload.pdf_source(), file_hash, filename)
+    if result is None:
+        return jsonify({"error": "no extractable text"}), 400
+
+    response = {
+        "assignments": result["assignments"],
         "file_hash": file_hash,
-        "study_plans": {}
-    })
+        "study_plans": result["study_plans"],
+        "needs_upgrade": result["needs_upgrade"]
+    }
+    if result["changes"]:
+        # Revised syllabus: events added, removed or moved since the earlier version
+        response["changes"] = result["changes"]
+    return jsonify(response)
+
+
+@app.route("/extract_assignments/stream", methods=["POST"])
+def extract_assignments_stream():
+    """Like /extract_assignments, but streams events as NDJSON while they are extracted."""
+    if "file" not in request.files:
+        return jsonify({"error": "missing file"}), 400
+
+    file = request.files["file"]
+    filename = file.filename
+    upload = read_upload(file)
+    file_hash = upload.hexdigest()
+
+    cached = get_cached_extraction(file_hash, filename)
+    # The request closes (and deletes) the spooled upload before the body is
+    # generated, so cold extractions take ownership of it.
+    pdf_source = upload.detach() if cached is None else None
+    return Response(
+        stream_extraction(pdf_source, file_hash, filename, cached),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def extraction_job_status(job_id):
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    return jsonify(public_job_view(job))
+
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def extraction_job_events(job_id):
+    """Server-sent progress events until the job finishes."""
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+
+    def stream(job):
+        deadline = time.monotonic() + JOB_EVENTS_MAX_SECONDS
+        version = None
+        while job is not None:
+            if job.get("version") != version:
+                version = job.get("version")
+                yield f"event: progress\ndata: {json.dumps(public_job_view(job))}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+            if job["status"] in FINISHED_STATES or time.monotonic() >= deadline:
+                return
+            job = job_store.wait_for_change(job_id, version, timeout=15)
+
+    return Response(
+        stream(job),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.route("/json_to_ics", methods=["POST"])
@@ -611,62 +1859,20 @@ def pdf_to_ics_endpoint():
 
     file = request.files["file"]
     filename = file.filename
-    pdf_bytes = file.read()
+    upload = read_upload(file)
 
-    # Generate SHA256 hash of PDF
-    file_hash = hashlib.sha256(pdf_bytes).hexdigest()
+    # SHA256 hash of PDF (computed while the upload was spooled)
+    file_hash = upload.hexdigest()
 
     # Check cache first
-    if course_collection is not None:
-        try:
-            cached = course_collection.find_one({"_id": file_hash})
-            if cached and "assignments" in cached:
-                items = normalize_extracted_assignments(cached["assignments"])
-                update_fields = {}
-                if "created_at" not in cached:
-                    update_fields["created_at"] = datetime.utcnow()
-                if items != cached["assignments"]:
-                    update_fields["assignments"] = items
-                if update_fields:
-                    course_collection.update_one(
-                        {"_id": file_hash},
-                        {"$set": update_fields}
-                    )
-                print(f"Cache hit for {filename} (hash: {file_hash[:8]}...)")
-                course_name = request.args.get("course_name", "Course Assignments")
-                ics_content = json_to_ics(items, course_name)
-                return send_file(
-                    BytesIO(ics_content.encode('utf-8')),
-                    mimetype="text/calendar",
-                    as_attachment=True,
-                    download_name=f"{course_name}.ics"
-                )
-        except Exception as e:
-            print(f"Cache lookup failed: {e}")
-
-    text = extract_text_from_pdf_bytes(pdf_bytes)
-    if not text.strip():
-        return jsonify({"error": "no extractable text"}), 400
-
-    if USE_LOCAL_FALLBACK:
-        items = normalize_extracted_assignments(parse_events_local(text))
+    cached = get_cached_extraction(file_hash, filename)
+    if cached is not None:
+        items = cached["assignments"]
     else:
-        items = normalize_extracted_assignments(call_openrouter_to_extract_assignments(text))
-
-    # Cache the result
-    if course_collection is not None:
-        try:
-            course_collection.insert_one({
-                "_id": file_hash,
-                "filename": filename,
-                "assignments": items,
-                "created_at": datetime.utcnow(),
-            })
-            print(f"Cached assignments for {filename} (hash: {file_hash[:8]}...)")
-        except DuplicateKeyError:
-            print(f"Cache already exists for {filename} (race condition)")
-        except Exception as e:
-            print(f"Cache save failed: {e}")
+        result = coalesced_cold_extraction(upload.pdf_source(), file_hash, filename)
+        if result is None:
+            return jsonify({"error": "no extractable text"}), 400
+        items = result["assignments"]
 
     course_name = request.args.get("course_name", "Course Assignments")
 
@@ -704,58 +1910,28 @@ def generate_study_plan_endpoint():
         generation_assignments = data
         cached_doc = None
 
-        if file_hash and course_collection is not None:
+        if file_hash and course_store is not None:
             try:
-                cached_doc = course_collection.find_one({"_id": file_hash})
+                cached_doc = find_course_doc(file_hash, ("assignments", "study_plans", "schema_version"))
                 if allow_cache and cached_doc and "study_plans" in cached_doc and course_name in cached_doc["study_plans"]:
                     print(f"Cache hit for study plan: {course_name} (hash: {file_hash[:8]}...)")
                     study_plan = cached_doc["study_plans"][course_name]
 
-                # If caching is enabled, only allow DB writes from original extracted assignments in Mongo.
+                # If caching is enabled, only allow per-PDF writes from original extracted assignments in Mongo.
                 if allow_cache:
                     if cached_doc and "assignments" in cached_doc:
-                        generation_assignments = normalize_extracted_assignments(cached_doc["assignments"])
+                        generation_assignments = stored_assignments(cached_doc)
                     else:
-                        # No original Gemini extraction available for this hash, so disable cache writes.
+                        # No original Gemini extraction available for this hash, so disable per-PDF writes.
                         allow_cache = False
             except Exception as e:
                 print(f"Study plan cache lookup failed: {e}")
         
-        # Generate study plan if not cached
+        # Generate study plan if not cached. Edited lists still go through the
+        # content-addressed study plan cache, keyed by the list itself.
         if study_plan is None:
-            if USE_LOCAL_FALLBACK:
-                # Simple fallback: return a basic study plan structure
-                study_plan = {
-                    "overview": f"Study plan for {course_name}",
-                    "weekly_schedule": [
-                        "Review syllabus and course materials",
-                        "Complete assigned readings",
-                        "Work on assignments and projects",
-                        "Prepare for exams and quizzes"
-                    ],
-                    "study_tips": [
-                        "Start assignments early to avoid last-minute rush",
-                        "Form a study group with classmates",
-                        "Review notes regularly, not just before the exam",
-                        "Attend office hours if you need clarification",
-                        "Take care of your physical and mental health"
-                    ],
-                    "resource_recommendations": "Take advantage of tutoring services, online resources, and library materials available at your institution."
-                }
-            else:
-                study_plan = call_openrouter_to_generate_study_plan(generation_assignments, course_name)
-            
-            # Cache the generated study plan
-            if allow_cache and file_hash and course_collection is not None:
-                try:
-                    course_collection.update_one(
-                        {"_id": file_hash},
-                        {"$set": {f"study_plans.{course_name}": study_plan}},
-                        upsert=False
-                    )
-                    print(f"Cached study plan for {course_name} (hash: {file_hash[:8]}...)")
-                except Exception as e:
-                    print(f"Study plan cache save failed: {e}")
+            plan_file_hash = file_hash if allow_cache and course_store is not None else None
+            study_plan = generate_cached_study_plan(generation_assignments, course_name, plan_file_hash)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -764,7 +1940,7 @@ def generate_study_plan_endpoint():
 
 @app.route("/share_discord", methods=["POST"])
 def share_discord():
-    if course_collection is None:
+    if discord_optins is None:
         return jsonify({"error": "database unavailable"}), 503
 
     payload = request.get_json()
@@ -779,52 +1955,23 @@ def share_discord():
         return jsonify({"error": "missing file_hash"}), 400
     if not discord_handle:
         return jsonify({"error": "missing discord_handle"}), 400
-    doc = course_collection.find_one({"_id": file_hash}) or {}
-    shared_discords = doc.get("shared_discords", [])
-    changed = False
-
-    if "created_at" not in doc:
-        changed = True
-        doc["created_at"] = datetime.utcnow()
-
-    lower_handle = discord_handle.lower()
-    existing_entry = None
-    for entry in shared_discords:
-        if entry.get("handle", "").lower() == lower_handle:
-            existing_entry = entry
-            break
 
-    if existing_entry is None:
-        shared_discords.append({
-            "handle": discord_handle,
-            "created_at": datetime.utcnow().isoformat() + "Z",
-            "avatar_url": avatar_url,
-        })
-        changed = True
-    elif avatar_url and not existing_entry.get("avatar_url"):
-        existing_entry["avatar_url"] = avatar_url
-        changed = True
-
-    if changed:
-        try:
-            course_collection.update_one(
-                {"_id": file_hash},
-                {"$set": {
-                    "shared_discords": shared_discords,
-                    "created_at": doc.get("created_at", datetime.utcnow()),
-                }},
-                upsert=True,
-            )
-        except Exception as e:
-            print(f"share_discord update failed: {e}")
-            return jsonify({"error": "database update failed"}), 500
+    try:
+        import_legacy_optins(file_hash)
+        # Single conditional insert on (file_hash, lowercased handle)
+        added = discord_optins.add(file_hash, discord_handle, avatar_url)
+    except ConnectionFailure:
+        raise
+    except Exception as e:
+        print(f"share_discord update failed: {e}")
+        return jsonify({"error": "database update failed"}), 500
 
-    return jsonify({"shared_discords": shared_discords, "added": existing_entry is None})
+    return jsonify({"handle": discord_handle, "added": added})
 
 
 @app.route("/shared_discords", methods=["POST"])
 def shared_discords():
-    if course_collection is None:
+    if discord_optins is None:
         return jsonify({"error": "database unavailable"}), 503
 
     payload = request.get_json()
@@ -839,31 +1986,30 @@ def shared_discords():
     if not viewer_handle:
         return jsonify({"error": "missing viewer_handle"}), 400
 
-    doc = course_collection.find_one({"_id": file_hash}) or {}
-    shared_discords_list = doc.get("shared_discords", [])
-
-    viewer_lower = viewer_handle.lower()
-    is_opted_in = any(entry.get("handle", "").lower() == viewer_lower for entry in shared_discords_list)
-    if not is_opted_in:
+    cursor = payload.get("cursor")
+    if cursor is not None and not isinstance(cursor, str):
+        return jsonify({"error": "cursor must be a string"}), 400
+    try:
+        limit = int(payload.get("limit", DISCORD_MATCHES_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, DISCORD_MATCHES_MAX_PAGE_SIZE))
+
+    if cursor is None:
+        import_legacy_optins(file_hash)
+    if not discord_optins.is_opted_in(file_hash, viewer_handle):
         return jsonify({"error": "opt-in required"}), 403
 
-    # Return ALL opted-in users (mark the viewer with is_you)
-    unique = {}
-    for entry in shared_discords_list:
-        handle = entry.get("handle")
-        if not handle:
-            continue
-        key = handle.lower()
-        if key not in unique:
-            unique[key] = {
-                "handle": handle,
-                "avatar_url": entry.get("avatar_url", ""),
-                "is_you": key == viewer_lower,
-            }
-
-    sorted_entries = [unique[key] for key in sorted(unique.keys())]
-
-    return jsonify({"shared_discords": sorted_entries})
+    # Compact page: [handle, avatar_url] pairs in handle order. The client
+    # marks the viewer itself; the total only comes with the first page.
+    entries, next_cursor = discord_optins.page(file_hash, cursor, limit)
+    response = {
+        "items": [[entry["handle"], entry.get("avatar_url", "")] for entry in entries],
+        "next_cursor": next_cursor,
+    }
+    if cursor is None:
+        response["total"] = discord_optins.count(file_hash)
+    return jsonify(response)
 
 
 @app.route("/discord/oauth/start", methods=["GET"])
@@ -904,7 +2050,8 @@ def discord_oauth_callback():
         return "Invalid OAuth state", 400
     _pending_oauth_states.pop(state, None)
 
-    token_response = requests.post(
+    discord = get_session("discord")
+    token_response = discord.post(
         "https://discord.com/api/oauth2/token",
         headers={"Content-Type": "application/x-www-form-urlencoded"},
         data={
@@ -914,7 +2061,7 @@ def discord_oauth_callback():
             "code": code,
             "redirect_uri": DISCORD_REDIRECT_URI,
         },
-        timeout=30,
+        timeout=http_timeout(30),
     )
 
     if not token_response.ok:
@@ -925,10 +2072,10 @@ def discord_oauth_callback():
     if not access_token:
         return "Missing access token", 400
 
-    user_response = requests.get(
+    user_response = discord.get(
         "https://discord.com/api/users/@me",
         headers={"Authorization": f"Bearer {access_token}"},
-        timeout=30,
+        timeout=http_timeout(30),
     )
 
     if not user_response.ok:
@@ -0,0 +1,75 @@
+"""
+Bulk upgrade of cached extraction documents to the current schema version.
+
+Documents written by the current code carry `schema_version`; their stored
+assignments are already normalized, so the read path returns them as-is.
+Older documents are rewritten here in batches of bulk updates (bulk_write on
+MongoDB) instead of one read-time update per cache hit. The migration is
+idempotent (each update is conditioned on the old version), so every worker
+process may run it.
+"""
+import os
+import time
+from datetime import datetime
+
+
+CACHE_MIGRATION_ON_STARTUP = os.getenv("CACHE_MIGRATION_ON_STARTUP", "true").lower() == "true"
+CACHE_MIGRATION_BATCH_SIZE = int(os.getenv("CACHE_MIGRATION_BATCH_SIZE", "200"))
+
+
+def migrate_cache_documents(store, schema_version: int, normalize, batch_size: int = CACHE_MIGRATION_BATCH_SIZE) -> int:
+    """
+    Normalize and stamp every cached extraction older than `schema_version`.
+
+    Args:
+        store: Course cache DocumentStore
+        schema_version: Current schema version
+        normalize: Function mapping a stored assignment list to its normalized form
+        batch_size: Documents per bulk_write
+
+    Returns:
+        Number of documents upgraded
+    """
+    started = time.monotonic()
+    query = {"assignments": {"$exists": True}, "schema_version": {"$ne": schema_version}}
+    documents = store.iter_documents(query, ("assignments", "created_at"))
+
+    upgraded = 0
+    batch = []
+    for doc in documents:
+        fields = {"assignments": normalize(doc["assignments"]), "schema_version": schema_version}
+        if "created_at" not in doc:
+            # Without it the TTL index never expires the document.
+            fields["created_at"] = datetime.utcnow()
+        batch.append((doc["_id"], fields, {"schema_version": {"$ne": schema_version}}))
+        if len(batch) >= batch_size:
+            upgraded += store.bulk_update_fields(batch)
+            batch = []
+    if batch:
+        upgraded += store.bulk_update_fields(batch)
+
+    if upgraded:
+        print(f"Migrated {upgraded} cache documents to schema v{schema_version} in {time.monotonic() - started:.1f}s")
+    return upgraded
+
+
+def migrate_shared_discords(store, optins) -> int:
+    """
+    Move legacy `shared_discords` arrays off course documents into opt-in records.
+
+    Args:
+        store: Course cache DocumentStore
+        optins: DiscordOptIns receiving the entries
+
+    Returns:
+        Number of course documents migrated
+    """
+    migrated = 0
+    for doc in store.iter_documents({"shared_discords": {"$exists": True}}, ("shared_discords",)):
+        optins.import_legacy(doc["_id"], doc["shared_discords"])
+        # Only dropped once every entry has been copied.
+        store.update_fields(doc["_id"], unset_fields=("shared_discords",))
+        migrated += 1
+    if migrated:
+        print(f"Moved Discord opt-ins of {migrated} course documents to their own records")
+    return migrated
@@ -0,0 +1,75 @@
+"""
+Helpers for map-reduce LLM extraction over long documents.
+
+Text is split on line boundaries into overlapping chunks so an event line
+near a boundary appears whole in at least one chunk. Results from every chunk
+are merged and deduplicated by (normalized title, due date), keeping the
+entry with the highest accuracy.
+"""
+import re
+
+
+_TITLE_PUNCT_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def split_text_into_chunks(text: str, max_chars: int, overlap_chars: int = 0) -> list:
+    """
+    Split text into chunks of at most ~max_chars characters.
+
+    Args:
+        text: Document text
+        max_chars: Target chunk size; a single longer line becomes its own chunk
+        overlap_chars: Trailing lines (up to this many characters) of each chunk
+            are repeated at the start of the next one
+
+    Returns:
+        List of chunk strings (a single element for short text)
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks = []
+    current = []
+    current_len = 0
+    for line in text.split("\n"):
+        line_len = len(line) + 1
+        if current and current_len + line_len > max_chars:
+            chunks.append("\n".join(current))
+            overlap = []
+            overlap_len = 0
+            for prev in reversed(current):
+                if overlap_len + len(prev) + 1 > overlap_chars:
+                    break
+                overlap.insert(0, prev)
+                overlap_len += len(prev) + 1
+            current, current_len = overlap, overlap_len
+        current.append(line)
+        current_len += line_len
+
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def normalize_title(title: str) -> str:
+    title = _TITLE_PUNCT_RE.sub(" ", (title or "").lower())
+    return _WHITESPACE_RE.sub(" ", title).strip()
+
+
+def merge_extracted_events(event_lists) -> list:
+    """
+    Merge normalized event lists, deduplicating by (normalized title, due_date).
+
+    The first-seen order is kept; for duplicates the entry with the highest
+    accuracy wins.
+    """
+    merged = {}
+    for events in event_lists:
+        for event in events:
+            key = (normalize_title(event.get("title")), event.get("due_date"))
+            existing = merged.get(key)
+            # Reassigning an existing key keeps its original position.
+            if existing is None or event.get("accuracy", 0) > existing.get("accuracy", 0):
+                merged[key] = event
+    return list(merged.values())
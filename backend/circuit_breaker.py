@@ -0,0 +1,65 @@
+"""
+Minimal thread-safe circuit breaker for upstream API calls.
+
+closed    -> calls flow; consecutive failures are counted
+open      -> calls are refused until `reset_seconds` have passed
+half_open -> a single probe call is let through; success closes the
+             breaker, failure opens it again
+"""
+import time
+from threading import Lock
+
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_seconds: float, name: str = "upstream"):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.name = name
+        self._lock = Lock()
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == STATE_OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                return STATE_HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a call may proceed (claims the probe slot when half open)."""
+        with self._lock:
+            if self._state == STATE_CLOSED:
+                return True
+            if self._state == STATE_OPEN:
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    return False
+                self._state = STATE_HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != STATE_OPEN:
+                    print(f"Circuit breaker for {self.name} opened after {self._failures} failure(s)")
+                self._state = STATE_OPEN
+                self._opened_at = time.monotonic()
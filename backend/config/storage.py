@@ -0,0 +1,74 @@
+"""
+Storage backend selection.
+
+STORAGE_BACKEND=mongo (default) uses the Atlas collections from
+backend/config/mongo.py; "sqlite" keeps everything in SQLITE_PATH and
+"memory" in process memory, so the app, tests and benchmarks run without a
+network database. Stores are None when the selected backend is unavailable.
+
+MongoDB stores always exist: they connect in the background and raise
+DatabaseUnavailableError while the cluster is unreachable (see
+backend/config/mongo.py). Work that needs the database at startup, such as the
+cache migration, goes through on_storage_ready() instead of running at import.
+"""
+from threading import Thread
+
+from backend.storage import (
+    COURSE_TTL_SECONDS,
+    SQLITE_PATH,
+    STORAGE_BACKEND,
+    STUDY_PLAN_TTL_SECONDS,
+    MemoryDocumentStore,
+    MongoDocumentStore,
+    SQLiteDocumentStore,
+)
+
+
+# Job records and extraction leases have dedicated in-process fallbacks
+# (InMemoryJobStore, SingleFlight), so they are only shared through MongoDB.
+job_collection = None
+lease_collection = None
+
+if STORAGE_BACKEND == "mongo":
+    from backend.config import mongo
+
+    course_store = MongoDocumentStore(mongo.course_collection)
+    study_plan_store = MongoDocumentStore(mongo.study_plan_collection)
+    optin_store = MongoDocumentStore(mongo.optin_collection)
+    job_collection = mongo.job_collection
+    lease_collection = mongo.lease_collection
+    # Connect in the background now so the first request rarely has to wait.
+    mongo.connector.start()
+elif STORAGE_BACKEND == "sqlite":
+    try:
+        course_store = SQLiteDocumentStore(
+            SQLITE_PATH, "course_info", ttl_field="created_at", ttl_seconds=COURSE_TTL_SECONDS, indexes=("text_key",)
+        )
+        study_plan_store = SQLiteDocumentStore(
+            SQLITE_PATH, "study_plans", ttl_field="last_used_at", ttl_seconds=STUDY_PLAN_TTL_SECONDS
+        )
+        optin_store = SQLiteDocumentStore(
+            SQLITE_PATH, "discord_optins", ttl_field="created_at", ttl_seconds=COURSE_TTL_SECONDS,
+            indexes=(("file_hash", "handle_key"),)
+        )
+        print(f"SQLite storage ready at {SQLITE_PATH}")
+    except Exception as e:
+        print(f"SQLite storage unavailable: {e}")
+        course_store = None
+        study_plan_store = None
+        optin_store = None
+elif STORAGE_BACKEND == "memory":
+    course_store = MemoryDocumentStore(ttl_field="created_at", ttl_seconds=COURSE_TTL_SECONDS)
+    study_plan_store = MemoryDocumentStore(ttl_field="last_used_at", ttl_seconds=STUDY_PLAN_TTL_SECONDS)
+    optin_store = MemoryDocumentStore(ttl_field="created_at", ttl_seconds=COURSE_TTL_SECONDS)
+    print("Using in-memory storage (data is lost on restart)")
+else:
+    raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND!r} (expected mongo, sqlite or memory)")
+
+
+def on_storage_ready(callback):
+    """Run `callback()` in a background thread once the storage backend is reachable."""
+    if STORAGE_BACKEND == "mongo":
+        mongo.connector.on_ready(callback)
+    else:
+        Thread(target=callback, daemon=True).start()
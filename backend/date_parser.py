@@ -0,0 +1,296 @@
+"""
+Single-pass date tokenizer for syllabus text.
+
+One precompiled pattern recognizes, in a single scan of each line:
+    - month names:   "Jan 15", "January 15th, 2026", "15 January"
+    - ISO dates:     "2026-01-15"
+    - numeric dates: "1/15", "01/15/2026" (month first; without a year,
+                     weekday, range or a keyword like "due" in front, "1/3"
+                     is taken for a fraction and skipped)
+    - weekday prefixes ("Mon, Jan 15", "Friday 2/6") as part of the token
+    - ranges:        "Feb 17-21", "Mar 1 - Mar 5", "2/10 to 2/12"
+
+Yearless dates are resolved against the academic term of the document
+(find_term_mention / infer_term), so a winter syllabus parsed in December
+lands in the following year. resolve_date() memoizes (raw date, term) -> ISO
+date in a bounded process-wide cache shared by all requests.
+"""
+import os
+import re
+from collections import namedtuple
+from datetime import date
+from functools import lru_cache
+
+
+DATE_CACHE_SIZE = int(os.getenv("DATE_CACHE_SIZE", "8192"))
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+_MONTH = (
+    r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|"
+    r"sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+)
+_WEEKDAY = r"(?:mon|tue|wed|thu|fri|sat|sun)[a-z]*\.?,?\s+"
+_ORDINAL = r"(?:st|nd|rd|th)?"
+
+DATE_TOKEN_RE = re.compile(
+    rf"""
+    (?<![\w/-])
+    (?P<weekday>{_WEEKDAY})?
+    (?:
+        (?P<iso_y>\d{{4}})-(?P<iso_m>\d{{1,2}})-(?P<iso_d>\d{{1,2}})
+      | (?P<mon>{_MONTH})\s+(?P<mon_d>\d{{1,2}}){_ORDINAL}(?!\d)(?:,?\s+(?P<mon_y>\d{{4}}))?
+      | (?P<dm_d>\d{{1,2}}){_ORDINAL}\s+(?P<dm_mon>{_MONTH})(?:,?\s+(?P<dm_y>\d{{4}}))?(?![\s,]*\d)
+      | (?P<num_m>\d{{1,2}})/(?P<num_d>\d{{1,2}})(?:/(?P<num_y>\d{{4}}|\d{{2}}))?
+    )
+    (?![\w/%])
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# Continuation after a date token: "- 21", "to Mar 5", "– 2/12"
+RANGE_TAIL_RE = re.compile(
+    r"\s*(?:-|–|—|to|through|until)\s*(?P<day>\d{1,2})" + _ORDINAL + r"(?![\w/%])",
+    re.IGNORECASE,
+)
+RANGE_SEP_RE = re.compile(r"\s*(?:-|–|—|to|through|until)\s*", re.IGNORECASE)
+# Words that mark a following bare "M/D" as a date rather than a fraction
+NUMERIC_DATE_CONTEXT_RE = re.compile(
+    r"\b(?:due|on|by|before|after|until|from|through|date|dated|deadline|submit(?:ted)?)\b\W*$",
+    re.IGNORECASE,
+)
+
+TERM_RE = re.compile(
+    r"\b(?:(?P<season>fall|autumn|winter|spring|summer)(?:\s+(?:term|semester|session))?[\s,]+(?P<year>20\d{2})"
+    r"|(?P<year2>20\d{2})\s+(?P<season2>fall|autumn|winter|spring|summer))\b"
+    r"|\b(?P<ay_start>20\d{2})\s*[-–/]\s*(?P<ay_end>(?:20)?\d{2})\b(?![-/]\d)",
+    re.IGNORECASE,
+)
+
+# Footer lines whose years say nothing about the term
+COPYRIGHT_RE = re.compile(r"copyright|©|\(c\)\s*\d{4}", re.IGNORECASE)
+
+# Months each term covers, used to pick a term when the text names none.
+SEASON_MONTHS = {
+    "fall": frozenset((9, 10, 11, 12)),
+    "winter": frozenset((1, 2, 3, 4)),
+    "spring": frozenset((1, 2, 3, 4, 5)),
+    "summer": frozenset((5, 6, 7, 8)),
+}
+
+Term = namedtuple("Term", ["season", "year"])
+
+DateToken = namedtuple("DateToken", [
+    "start", "end", "text", "weekday",
+    "month", "day", "year",
+    "end_month", "end_day", "end_year",
+])
+
+
+def _month_number(name: str) -> int:
+    return MONTHS[name[:3].lower()]
+
+
+def _year(raw):
+    if not raw:
+        return None
+    value = int(raw)
+    return value + 2000 if value < 100 else value
+
+
+def _fields(match) -> tuple:
+    """Return (month, day, year) for a DATE_TOKEN_RE match."""
+    if match.group("iso_y"):
+        return int(match.group("iso_m")), int(match.group("iso_d")), int(match.group("iso_y"))
+    if match.group("mon"):
+        return _month_number(match.group("mon")), int(match.group("mon_d")), _year(match.group("mon_y"))
+    if match.group("dm_mon"):
+        return _month_number(match.group("dm_mon")), int(match.group("dm_d")), _year(match.group("dm_y"))
+    return int(match.group("num_m")), int(match.group("num_d")), _year(match.group("num_y"))
+
+
+def _valid(month: int, day: int) -> bool:
+    return 1 <= month <= 12 and 1 <= day <= 31
+
+
+def find_dates(line: str, bare_numeric: bool = False) -> list:
+    """
+    Tokenize every date (or date range) in a line in one left-to-right scan.
+
+    Args:
+        line: Text to scan
+        bare_numeric: Accept "M/D" without date context (for strings that are
+            known to hold a date)
+
+    Returns:
+        List of DateToken; for single dates end_* equals the start fields
+    """
+    tokens = []
+    pos = 0
+    length = len(line)
+    while pos < length:
+        match = DATE_TOKEN_RE.search(line, pos)
+        if match is None:
+            break
+        month, day, year = _fields(match)
+        if not _valid(month, day):
+            pos = match.end()
+            continue
+
+        end = match.end()
+        end_month, end_day, end_year = month, day, year
+
+        # Range continuation is matched in place at the end of the token, so
+        # the line is still scanned only once.
+        sep = RANGE_SEP_RE.match(line, end)
+        if sep is not None:
+            tail = DATE_TOKEN_RE.match(line, sep.end())
+            if tail is not None:
+                t_month, t_day, t_year = _fields(tail)
+                if _valid(t_month, t_day):
+                    end_month, end_day, end_year = t_month, t_day, t_year
+                    end = tail.end()
+            else:
+                tail = RANGE_TAIL_RE.match(line, end)
+                if tail is not None and _valid(month, int(tail.group("day"))):
+                    end_day = int(tail.group("day"))
+                    end = tail.end()
+
+        weekday = match.group("weekday")
+        if (not bare_numeric and match.group("num_m") and not weekday and year is None and end == match.end()
+                and not NUMERIC_DATE_CONTEXT_RE.search(line, 0, match.start())):
+            # A bare "1/3" ("worth 1/3 of the grade") is more likely a fraction.
+            pos = match.end()
+            continue
+        tokens.append(DateToken(
+            start=match.start(),
+            end=end,
+            text=line[match.start():end],
+            weekday=weekday.strip(" ,.").lower() if weekday else None,
+            month=month,
+            day=day,
+            year=year if year is not None else end_year,
+            end_month=end_month,
+            end_day=end_day,
+            end_year=end_year if end_year is not None else year,
+        ))
+        pos = end
+    return tokens
+
+
+@lru_cache(maxsize=4096)
+def normalize_date(month: int, day: int, year: int):
+    """Return YYYY-MM-DD for a calendar date, or None if it does not exist."""
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def parse_date_string(date_str: str, default_year: int):
+    """Parse the first date in a free-form string to YYYY-MM-DD (memoized)."""
+    tokens = find_dates(date_str, bare_numeric=True)
+    if not tokens:
+        return None
+    token = tokens[0]
+    year = token.year if token.year is not None else default_year
+    return normalize_date(token.month, token.day, year)
+
+
+# ----------------------------
+# Academic term inference
+# ----------------------------
+def find_term_mention(text: str, allow_spans: bool = True):
+    """
+    Return the first explicit term in the text ("Fall 2025", "2026 Winter"),
+    else the first academic-year span ("2025-26", mapped to the fall term) if
+    `allow_spans`, else None. Copyright lines ("© 2019-2020") are skipped.
+    """
+    span_term = None
+    for line in text.split("\n"):
+        if COPYRIGHT_RE.search(line):
+            continue
+        for match in TERM_RE.finditer(line):
+            if not match.group("ay_start"):
+                season = (match.group("season") or match.group("season2")).lower()
+                year = int(match.group("year") or match.group("year2"))
+                return Term("fall" if season == "autumn" else season, year)
+            if span_term is not None or not allow_spans:
+                continue
+            start = int(match.group("ay_start"))
+            end = int(match.group("ay_end"))
+            if end < 100:
+                end += (start // 100) * 100
+            if end == start + 1:
+                span_term = Term("fall", start)
+    return span_term
+
+
+def _current_term(today: date) -> Term:
+    if today.month >= 9:
+        return Term("fall", today.year)
+    if today.month >= 5:
+        return Term("summer", today.year)
+    return Term("winter", today.year)
+
+
+def _shift_term(term: Term, steps: int) -> Term:
+    order = ["winter", "summer", "fall"]
+    index = order.index(term.season if term.season in order else "winter") + steps
+    return Term(order[index % 3], term.year + index // 3)
+
+
+def infer_term(months, today: date = None) -> Term:
+    """
+    Pick the term a document most likely belongs to when it names none.
+
+    Candidates are the current term, the next two and the previous one; the
+    one whose months cover the most of the document's dates wins, preferring
+    the current term, then upcoming ones, on ties.
+    """
+    today = today or date.today()
+    current = _current_term(today)
+    candidates = [current, _shift_term(current, 1), _shift_term(current, 2), _shift_term(current, -1)]
+    months = list(months)
+    if not months:
+        return current
+
+    best, best_score = current, -1
+    for candidate in candidates:
+        covered = SEASON_MONTHS[candidate.season]
+        score = sum(1 for month in months if month in covered)
+        if score > best_score:
+            best, best_score = candidate, score
+    return best
+
+
+def year_for_month(month: int, term: Term) -> int:
+    """Resolve the calendar year of a yearless month within a term."""
+    if term.season == "fall":
+        # Fall syllabi occasionally list January exams.
+        return term.year if month >= 8 else term.year + 1
+    if term.season in ("winter", "spring"):
+        # Full-year and winter syllabi may refer back to the fall.
+        return term.year if month <= 8 else term.year - 1
+    return term.year
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def resolve_date(raw_date: str, term: Term):
+    """
+    Resolve a raw date token (e.g. "Mon, Feb 3" or "Dec 20 - Jan 5") to an
+    ISO due date within a term. Explicit years always win.
+    """
+    tokens = find_dates(raw_date, bare_numeric=True)
+    if not tokens:
+        return None
+    token = tokens[0]
+    if token.end_year is not None:
+        year = token.end_year
+    else:
+        year = year_for_month(token.end_month, term)
+    return normalize_date(token.end_month, token.end_day, year)
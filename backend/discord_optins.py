@@ -0,0 +1,109 @@
+"""
+Discord opt-ins ("find classmates") per syllabus.
+
+Each opt-in is its own document with `_id` `<file_hash>:<lowercased handle>`
+(plus a unique (file_hash, handle_key) index on MongoDB), so adding one is a
+single insert that the unique key makes atomic: concurrent shares of the
+same handle cannot both land, and shares of different handles never touch
+each other's data. Earlier versions kept a `shared_discords` array on the
+course document; import_legacy() moves those entries over.
+
+Listing pages through the (file_hash, handle_key) index with a keyset
+cursor, so a page costs the same however many classmates opted in.
+"""
+from datetime import datetime
+
+
+def handle_key(handle: str) -> str:
+    """Case-insensitive identity of a handle."""
+    return handle.lower()
+
+
+def optin_id(file_hash: str, key: str) -> str:
+    return f"{file_hash}:{key}"
+
+
+def _parse_created_at(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.rstrip("Z"))
+        except ValueError:
+            pass
+    return None
+
+
+class DiscordOptIns:
+    """Opt-in records kept in a DocumentStore."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def add(self, file_hash: str, handle: str, avatar_url: str = "", created_at: datetime = None) -> bool:
+        """
+        Opt `handle` in for a syllabus.
+
+        Args:
+            file_hash: Syllabus PDF hash
+            handle: Normalized Discord handle (original casing is kept for display)
+            avatar_url: Avatar to show next to the handle, if known
+            created_at: Opt-in time (defaults to now)
+
+        Returns:
+            True if the handle was added, False if it was already opted in
+        """
+        key = handle_key(handle)
+        doc_id = optin_id(file_hash, key)
+        added = self.store.insert_if_absent({
+            "_id": doc_id,
+            "file_hash": file_hash,
+            "handle_key": key,
+            "handle": handle,
+            "avatar_url": avatar_url or "",
+            "created_at": created_at or datetime.utcnow(),
+        })
+        if not added and avatar_url:
+            # Fill in an avatar the first opt-in lacked; never replace one.
+            self.store.update_fields(doc_id, {"avatar_url": avatar_url}, match={"avatar_url": ""})
+        return added
+
+    def is_opted_in(self, file_hash: str, handle: str) -> bool:
+        return self.store.get(optin_id(file_hash, handle_key(handle)), ("_id",)) is not None
+
+    def page(self, file_hash: str, after: str = None, limit: int = 50):
+        """
+        One page of opt-ins for a syllabus, ordered by handle_key.
+
+        Args:
+            file_hash: Syllabus PDF hash
+            after: Cursor from the previous page (a handle_key), or None for the first page
+            limit: Page size
+
+        Returns:
+            (entries, next_cursor); next_cursor is None on the last page
+        """
+        docs = self.store.find_page(
+            {"file_hash": file_hash}, "handle_key", after=after, limit=limit + 1,
+            fields=("handle", "handle_key", "avatar_url"),
+        )
+        if len(docs) > limit:
+            docs = docs[:limit]
+            return docs, docs[-1]["handle_key"]
+        return docs, None
+
+    def count(self, file_hash: str) -> int:
+        return self.store.count({"file_hash": file_hash})
+
+    def import_legacy(self, file_hash: str, entries: list) -> int:
+        """Copy entries of a legacy `shared_discords` array; returns how many were new."""
+        imported = 0
+        for entry in entries or []:
+            if not isinstance(entry, dict):
+                continue
+            handle = (entry.get("handle") or "").strip()
+            if not handle:
+                continue
+            if self.add(file_hash, handle, entry.get("avatar_url") or "", _parse_created_at(entry.get("created_at"))):
+                imported += 1
+        return imported
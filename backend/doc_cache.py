@@ -0,0 +1,122 @@
+"""
+In-process L1 cache in front of DocumentStore.get() (a MongoDB `find_one`).
+
+Hot course documents (the same syllabus uploaded by a whole class at term
+start) are served from a bounded LRU with a short TTL instead of a network
+round trip. Callers ask for the fields they need; an entry remembers which
+fields it holds and widens itself with one projected read when a caller
+needs more.
+
+Our own writes call invalidate() (write-through invalidation). Writes from
+other processes become visible once the TTL expires, so callers that must
+see them (e.g. membership checks) can pass refresh=True.
+"""
+import copy
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+COURSE_CACHE_L1_ENABLED = os.getenv("COURSE_CACHE_L1_ENABLED", "true").lower() == "true"
+COURSE_CACHE_L1_MAX_ENTRIES = int(os.getenv("COURSE_CACHE_L1_MAX_ENTRIES", "1024"))
+COURSE_CACHE_L1_TTL_SECONDS = float(os.getenv("COURSE_CACHE_L1_TTL_SECONDS", "30"))
+
+
+class _Entry:
+    __slots__ = ("doc", "fields", "expires_at")
+
+    def __init__(self, doc: dict, fields, expires_at: float):
+        self.doc = doc
+        self.fields = fields
+        self.expires_at = expires_at
+
+
+class DocumentCache:
+    """Bounded LRU/TTL cache of (partial) documents keyed by `_id`."""
+
+    def __init__(self, store, max_entries: int = COURSE_CACHE_L1_MAX_ENTRIES,
+                 ttl_seconds: float = COURSE_CACHE_L1_TTL_SECONDS):
+        self.store = store
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # Bumped by invalidate(); a read that raced a write is not stored.
+        self._generations = {}
+        self._epoch = 0
+        self._lock = Lock()
+
+    def get(self, doc_id: str, fields=None, refresh: bool = False):
+        """
+        Return the document (or the requested fields of it) by `_id`.
+
+        Args:
+            doc_id: Document `_id`
+            fields: Iterable of top-level field names, or None for the whole document
+            refresh: Skip the cached copy and re-read from the database
+
+        Returns:
+            A private copy of the (projected) document, or None if it does not exist
+        """
+        wanted = frozenset(fields) if fields is not None else None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(doc_id)
+            if entry is not None and entry.expires_at <= now:
+                del self._entries[doc_id]
+                entry = None
+            if entry is not None and not refresh and self._covers(entry.fields, wanted):
+                self._entries.move_to_end(doc_id)
+                self.hits += 1
+                return self._project(entry.doc, wanted)
+            self.misses += 1
+            generation = (self._epoch, self._generations.get(doc_id, 0))
+            # Widen rather than replace what is already cached for this id.
+            if entry is not None and wanted is not None and entry.fields is not None:
+                load_fields = entry.fields | wanted
+            else:
+                load_fields = wanted if entry is None or refresh else None
+
+        doc = self.store.get(doc_id, load_fields)
+        if doc is None:
+            # Absence is never cached: another process may be inserting it.
+            return None
+
+        with self._lock:
+            if (self._epoch, self._generations.get(doc_id, 0)) == generation:
+                self._entries[doc_id] = _Entry(doc, load_fields, time.monotonic() + self.ttl_seconds)
+                self._entries.move_to_end(doc_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return self._project(doc, wanted)
+
+    def invalidate(self, doc_id: str):
+        """Drop the cached copy after writing to the document."""
+        with self._lock:
+            self._entries.pop(doc_id, None)
+            self._generations[doc_id] = self._generations.get(doc_id, 0) + 1
+            if len(self._generations) > self.max_entries * 4:
+                # Only in-flight reads care about generations; a new epoch
+                # keeps them from storing what they read.
+                self._generations.clear()
+                self._epoch += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+    @staticmethod
+    def _covers(cached_fields, wanted) -> bool:
+        if cached_fields is None:
+            return True
+        return wanted is not None and wanted <= cached_fields
+
+    @staticmethod
+    def _project(doc: dict, wanted):
+        if wanted is None:
+            return copy.deepcopy(doc)
+        return {name: copy.deepcopy(doc[name]) for name in ("_id", *wanted) if name in doc}
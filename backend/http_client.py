@@ -0,0 +1,62 @@
+"""
+Shared HTTP sessions with connection pooling and keep-alive.
+
+One requests.Session is kept per upstream service (OpenRouter, Discord), so
+repeated calls reuse pooled TCP+TLS connections instead of handshaking on
+every request. Sessions carry no per-user state: auth headers are passed per
+call and the cookie jar rejects every cookie, so nothing one user's call
+receives is replayed on another's. That keeps them safe to share across
+request threads; urllib3's connection pool is itself thread-safe.
+"""
+import os
+from http.cookiejar import DefaultCookiePolicy
+from threading import Lock
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+
+_sessions = {}
+_sessions_lock = Lock()
+
+
+def get_session(service: str = "default") -> requests.Session:
+    """
+    Return the pooled session for an upstream service, creating it on first use.
+
+    Args:
+        service: Logical name of the upstream (one pool per name)
+
+    Returns:
+        Shared requests.Session
+    """
+    session = _sessions.get(service)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(service)
+        if session is None:
+            session = requests.Session()
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[service] = session
+        return session
+
+
+def http_timeout(read: float = None) -> tuple:
+    """(connect, read) timeout tuple for requests calls."""
+    return (HTTP_CONNECT_TIMEOUT, read if read is not None else HTTP_READ_TIMEOUT)
+
+
+def close_sessions():
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
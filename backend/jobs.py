@@ -0,0 +1,195 @@
+"""
+Asynchronous extraction jobs.
+
+Uploads in job mode are acknowledged immediately (202) and processed by a
+bounded worker pool. Job records live in a pluggable JobStore:
+
+    - InMemoryJobStore: single process (development, tests)
+    - MongoJobStore:    shared collection, so any worker process can answer
+                        status/progress requests for a job started elsewhere
+
+Job ids are the PDF SHA-256, so repeated uploads of the same file attach to
+the job already running instead of starting a new one.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Condition
+
+from pymongo.errors import DuplicateKeyError
+
+
+EXTRACTION_JOB_WORKERS = int(os.getenv("EXTRACTION_JOB_WORKERS", "4"))
+EXTRACTION_JOB_TTL_SECONDS = int(os.getenv("EXTRACTION_JOB_TTL_SECONDS", "3600"))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+FINISHED_STATES = (JOB_DONE, JOB_FAILED)
+
+
+def _new_job(job_id: str, meta: dict = None) -> dict:
+    now = datetime.utcnow()
+    return {
+        "_id": job_id,
+        "status": JOB_QUEUED,
+        "stage": JOB_QUEUED,
+        "meta": meta or {},
+        "result": None,
+        "error": None,
+        "version": 0,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+class InMemoryJobStore:
+    """Process-local job records; finished jobs expire after `ttl_seconds`."""
+
+    def __init__(self, ttl_seconds: int = EXTRACTION_JOB_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._jobs = {}
+        self._changed = Condition()
+
+    def _expire(self):
+        cutoff = datetime.utcnow()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in FINISHED_STATES and (cutoff - job["updated_at"]).total_seconds() > self.ttl_seconds
+        ]
+        for job_id in expired:
+            self._jobs.pop(job_id, None)
+
+    def get(self, job_id: str):
+        with self._changed:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def create_if_absent(self, job_id: str, meta: dict = None):
+        """Create a queued job; returns (job, created). Failed jobs are replaced."""
+        with self._changed:
+            self._expire()
+            job = self._jobs.get(job_id)
+            if job is not None and job["status"] != JOB_FAILED:
+                return dict(job), False
+            job = _new_job(job_id, meta)
+            self._jobs[job_id] = job
+            self._changed.notify_all()
+            return dict(job), True
+
+    def update(self, job_id: str, **fields):
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            job["version"] += 1
+            job["updated_at"] = datetime.utcnow()
+            self._changed.notify_all()
+
+    def wait_for_change(self, job_id: str, version: int, timeout: float):
+        """Block until the job's version differs from `version` (or timeout)."""
+        with self._changed:
+            self._changed.wait_for(
+                lambda: (self._jobs.get(job_id) or {}).get("version") != version,
+                timeout=timeout,
+            )
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+
+class MongoJobStore:
+    """Job records in a MongoDB collection shared by all worker processes."""
+
+    def __init__(self, collection, poll_interval: float = 0.5):
+        self.collection = collection
+        self.poll_interval = poll_interval
+
+    def get(self, job_id: str):
+        return self.collection.find_one({"_id": job_id})
+
+    def create_if_absent(self, job_id: str, meta: dict = None):
+        job = _new_job(job_id, meta)
+        try:
+            self.collection.insert_one(job)
+            return job, True
+        except DuplicateKeyError:
+            pass
+
+        # Only one process wins the swap of a failed job for a fresh one.
+        if self.collection.find_one_and_replace({"_id": job_id, "status": JOB_FAILED}, job) is not None:
+            return job, True
+        return self.get(job_id), False
+
+    def update(self, job_id: str, **fields):
+        fields["updated_at"] = datetime.utcnow()
+        self.collection.update_one({"_id": job_id}, {"$set": fields, "$inc": {"version": 1}})
+
+    def wait_for_change(self, job_id: str, version: int, timeout: float):
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job.get("version") != version or time.monotonic() >= deadline:
+                return job
+            time.sleep(self.poll_interval)
+
+
+class JobRunner:
+    """Runs job functions on a bounded thread pool and records their outcome."""
+
+    def __init__(self, store, workers: int = EXTRACTION_JOB_WORKERS):
+        self.store = store
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract-job")
+
+    def submit(self, job_id: str, fn, *args, meta: dict = None, on_skip=None):
+        """
+        Queue `fn(progress, *args)` under `job_id` unless that job already exists.
+
+        `progress(stage)` lets the function report stages; its return value
+        becomes the job result and an exception marks the job failed.
+        `on_skip`, if given, is called when an existing job is reused (e.g. to
+        release the caller's copy of the upload).
+
+        Returns:
+            The job record
+        """
+        job, created = self.store.create_if_absent(job_id, meta)
+        if not created:
+            if on_skip is not None:
+                on_skip()
+            return job
+        self._pool.submit(self._run, job_id, fn, args)
+        return job
+
+    def _run(self, job_id: str, fn, args):
+        def progress(stage: str):
+            self.store.update(job_id, stage=stage)
+
+        self.store.update(job_id, status=JOB_RUNNING, stage=JOB_RUNNING)
+        try:
+            result = fn(progress, *args)
+        except Exception as e:
+            print(f"Extraction job {job_id[:8]}... failed: {e}")
+            self.store.update(job_id, status=JOB_FAILED, stage=JOB_FAILED, error=str(e))
+            return
+        self.store.update(job_id, status=JOB_DONE, stage=JOB_DONE, result=result)
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+def public_job_view(job: dict) -> dict:
+    """JSON-safe subset of a job record for API responses."""
+    view = {
+        "job_id": job["_id"],
+        "status": job["status"],
+        "stage": job.get("stage"),
+        "updated_at": job["updated_at"].isoformat() + "Z" if job.get("updated_at") else None,
+    }
+    if job["status"] == JOB_DONE:
+        view["result"] = job.get("result")
+    if job["status"] == JOB_FAILED:
+        view["error"] = job.get("error")
+    return view
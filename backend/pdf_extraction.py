@@ -0,0 +1,169 @@
+"""
+PDF text extraction with optional page-level parallelism.
+
+Small documents are extracted in the calling process. Documents with at least
+PDF_PARALLEL_MIN_PAGES pages are split into contiguous page ranges that are
+extracted by a bounded process pool and reassembled in page order.
+
+iter_page_texts() is the bounded-memory alternative: it yields one page at a
+time and drops each page's caches before moving on.
+"""
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from io import BytesIO
+from threading import Lock
+
+import pdfplumber
+
+
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "12"))
+
+# Bump the suffix whenever page text output changes (keys the page text cache).
+EXTRACTOR_VERSION = f"pdfplumber-{getattr(pdfplumber, '__version__', 'unknown')}/1"
+
+_pool = None
+_pool_lock = Lock()
+# The pool is created inside a threaded server (Mongo connector, write-behind,
+# thread pools); forking such a process can deadlock the children.
+_POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+@contextmanager
+def open_pdf(source, pages=None):
+    """
+    Open a PDF with pdfplumber.
+
+    Paths are memory-mapped read-only rather than read into memory, so every
+    process working on the same spooled upload shares the OS page cache.
+
+    Args:
+        source: Raw PDF bytes, a filesystem path, or a seekable binary file object
+        pages: Optional list of 1-based page numbers to load
+
+    Yields:
+        pdfplumber.PDF instance
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            with pdfplumber.open(view, pages=pages) as pdf:
+                yield pdf
+        return
+
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    with pdfplumber.open(source, pages=pages) as pdf:
+        yield pdf
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context(_POOL_START_METHOD)
+            )
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _extract_page_range(source, start: int, stop: int) -> list:
+    """Worker entry point: extract pages [start, stop) (0-based) in order."""
+    with open_pdf(source, pages=list(range(start + 1, stop + 1))) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+
+def _split_ranges(page_count: int, parts: int) -> list:
+    size, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        if stop > start:
+            ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def count_pages(source) -> int:
+    with open_pdf(source) as pdf:
+        return len(pdf.pages)
+
+
+def extract_page_texts(source, workers: int = None, parallel_threshold: int = None) -> list:
+    """
+    Extract text for every page of a PDF, preserving page order.
+
+    Args:
+        source: Raw PDF bytes or a filesystem path (must be picklable for the pool)
+        workers: Maximum worker processes (defaults to PDF_EXTRACT_WORKERS)
+        parallel_threshold: Minimum page count before the pool is used
+            (defaults to PDF_PARALLEL_MIN_PAGES)
+
+    Returns:
+        List with one string per page ('' for pages without text)
+    """
+    if workers is None:
+        workers = PDF_EXTRACT_WORKERS
+    if parallel_threshold is None:
+        parallel_threshold = PDF_PARALLEL_MIN_PAGES
+
+    page_count = count_pages(source)
+    if workers <= 1 or page_count < max(parallel_threshold, 2):
+        return _extract_page_range(source, 0, page_count)
+
+    ranges = _split_ranges(page_count, min(workers, page_count))
+    try:
+        pool = _get_pool(workers)
+        futures = [pool.submit(_extract_page_range, source, start, stop) for start, stop in ranges]
+        texts = []
+        for future in futures:
+            texts.extend(future.result())
+        return texts
+    except BrokenProcessPool as e:
+        print(f"PDF extraction pool failed, retrying in-process: {e}")
+        _reset_pool()
+        return _extract_page_range(source, 0, page_count)
+
+
+def _release_page(page):
+    # Page.close() exists in newer pdfplumber releases; flush_cache() in older ones.
+    release = getattr(page, "close", None) or getattr(page, "flush_cache", None)
+    if release is not None:
+        release()
+
+
+def iter_page_texts(source):
+    """
+    Yield the text of each page in order, one page at a time.
+
+    Each page's object and layout caches are released as soon as its text has
+    been extracted. Closing the generator early (or simply breaking out of the
+    loop) stops parsing and closes the document.
+
+    Args:
+        source: Raw PDF bytes, a filesystem path, or a seekable binary file object
+
+    Yields:
+        Page text ('' for pages without text)
+    """
+    with open_pdf(source) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text() or ""
+            _release_page(page)
+            yield text
+
+
+def join_page_texts(page_texts) -> str:
+    return "\n\n".join(t for t in page_texts if t)
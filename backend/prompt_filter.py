@@ -0,0 +1,80 @@
+"""
+Local pre-filter that shrinks LLM extraction prompts.
+
+Only lines that carry a date (as recognized by the local date tokenizer),
+a few lines of context around them, section headers and academic term
+mentions are kept. Everything else (policies, rubrics, accessibility
+statements) is dropped before the text is sent to OpenRouter.
+"""
+import re
+from collections import namedtuple
+
+from backend.date_parser import DATE_TOKEN_RE, TERM_RE
+
+
+HEADING_RE = re.compile(r"^[A-Z0-9][\w &/:,()'-]{1,60}$")
+MAX_HEADING_WORDS = 8
+GAP_MARKER = "..."
+
+PrefilterStats = namedtuple("PrefilterStats", ["original_tokens", "filtered_tokens", "kept_lines", "total_lines"])
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English prose)."""
+    return (len(text) + 3) // 4
+
+
+def _is_heading(line: str) -> bool:
+    if not HEADING_RE.match(line) or line.endswith("."):
+        return False
+    words = line.split()
+    if len(words) > MAX_HEADING_WORDS:
+        return False
+    return line.isupper() or sum(1 for w in words if w[:1].isupper()) >= max(1, len(words) // 2)
+
+
+def filter_date_lines(text: str, context_lines: int = 1):
+    """
+    Keep date-bearing lines plus context, section headers and term mentions.
+
+    Args:
+        text: Full document text
+        context_lines: Lines kept before and after every date-bearing line
+
+    Returns:
+        (filtered_text, PrefilterStats). If no line carries a date the original
+        text is returned unchanged so the model still sees relative schedules.
+    """
+    lines = text.split("\n")
+    keep = [False] * len(lines)
+    has_dates = False
+
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if DATE_TOKEN_RE.search(line):
+            has_dates = True
+            for j in range(max(0, i - context_lines), min(len(lines), i + context_lines + 1)):
+                keep[j] = True
+        elif _is_heading(stripped) or TERM_RE.search(line):
+            keep[i] = True
+
+    original_tokens = estimate_tokens(text)
+    if not has_dates:
+        return text, PrefilterStats(original_tokens, original_tokens, len(lines), len(lines))
+
+    out = []
+    gap = False
+    for line, kept in zip(lines, keep):
+        if kept and line.strip():
+            if gap and out:
+                out.append(GAP_MARKER)
+            out.append(line)
+            gap = False
+        elif not kept:
+            gap = True
+
+    filtered = "\n".join(out)
+    kept_count = sum(1 for line, kept in zip(lines, keep) if kept and line.strip())
+    return filtered, PrefilterStats(original_tokens, estimate_tokens(filtered), kept_count, len(lines))
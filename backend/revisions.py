@@ -0,0 +1,121 @@
+"""
+Incremental re-extraction of revised syllabi.
+
+A revision (a moved midterm) changes a page or two, so the new upload misses
+every cache yet is a near-duplicate of the cached original whose date lines
+differ (see backend/similarity.py). Cached documents keep a page index: a
+fingerprint of each page's text plus the month-days of the dates on it. A
+date is dirty when a page carrying it changed (in either version). Cached
+events on clean dates are kept; the changed pages, plus every unchanged page
+sharing a dirty date, are extracted again, so an event whose date also
+appears on an edited page is re-extracted rather than lost. If a cached
+event cannot be placed on any page (a date the model derived, e.g. from
+"Week 5"), or too much of the document changed, the whole document is
+extracted instead.
+"""
+import hashlib
+import os
+
+from backend.chunking import normalize_title
+from backend.date_parser import find_dates
+
+
+INCREMENTAL_EXTRACTION_ENABLED = os.getenv("INCREMENTAL_EXTRACTION_ENABLED", "true").lower() == "true"
+# Past this share of changed pages a full extraction is cheaper to reason about.
+INCREMENTAL_MAX_CHANGED_RATIO = 0.5
+
+
+def page_index(pages: list) -> list:
+    """One {"fp", "dates"} entry per page: text fingerprint and sorted "MM-DD" dates."""
+    index = []
+    for page in pages:
+        normalized = " ".join((page or "").split())
+        dates = set()
+        for line in (page or "").split("\n"):
+            for token in find_dates(line):
+                dates.add(f"{token.month:02d}-{token.day:02d}")
+                dates.add(f"{token.end_month:02d}-{token.end_day:02d}")
+        index.append({
+            "fp": hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).hexdigest(),
+            "dates": sorted(dates),
+        })
+    return index
+
+
+def plan_incremental(base_assignments: list, base_index: list, pages: list, new_index: list):
+    """
+    Split a revision into cached events to keep and pages to extract again.
+
+    Args:
+        base_assignments: Cached events of the earlier version
+        base_index: page_index() of the earlier version
+        pages: Page texts of the revision
+        new_index: page_index() of the revision
+
+    Returns:
+        {"kept": [...], "changed_pages": [...], "changed": n, "total": n}, or
+        None when the revision has to be extracted in full
+    """
+    if not base_index or not pages:
+        return None
+    new_fps = {entry["fp"] for entry in new_index}
+    base_fps = {entry["fp"] for entry in base_index}
+    base_dates = {month_day for entry in base_index for month_day in entry["dates"]}
+
+    dirty_dates = set()
+    for entry in base_index:
+        if entry["fp"] not in new_fps:
+            dirty_dates.update(entry["dates"])
+    for entry in new_index:
+        if entry["fp"] not in base_fps:
+            dirty_dates.update(entry["dates"])
+
+    changed_pages = [
+        page for page, entry in zip(pages, new_index)
+        if (page or "").strip() and (entry["fp"] not in base_fps or dirty_dates.intersection(entry["dates"]))
+    ]
+    if len(changed_pages) > len(pages) * INCREMENTAL_MAX_CHANGED_RATIO:
+        return None
+
+    kept = []
+    for event in base_assignments:
+        month_day = (event.get("due_date") or "")[5:10]
+        if not month_day or month_day not in base_dates:
+            return None
+        if month_day not in dirty_dates:
+            kept.append(event)
+    return {"kept": kept, "changed_pages": changed_pages, "changed": len(changed_pages), "total": len(pages)}
+
+
+def diff_events(old_events: list, new_events: list) -> dict:
+    """
+    Events added, removed and moved (same title, new date) between two versions.
+
+    Returns:
+        {"added": [...], "removed": [...], "moved": [{"title", "from", "to"}]}
+    """
+    def keyed(events):
+        return {(normalize_title(event.get("title")), event.get("due_date")): event for event in events}
+
+    old, new = keyed(old_events), keyed(new_events)
+    added = [event for key, event in new.items() if key not in old]
+    removed = [event for key, event in old.items() if key not in new]
+
+    moved = []
+    removed_by_title = {}
+    for event in removed:
+        removed_by_title.setdefault(normalize_title(event.get("title")), []).append(event)
+    still_added = []
+    for event in added:
+        candidates = removed_by_title.get(normalize_title(event.get("title")))
+        if candidates:
+            previous = candidates.pop(0)
+            moved.append({"title": event.get("title"), "from": previous.get("due_date"), "to": event.get("due_date")})
+            removed.remove(previous)
+        else:
+            still_added.append(event)
+
+    def brief(events):
+        return [{"title": event.get("title"), "due_date": event.get("due_date")} for event in events]
+
+    return {"added": brief(still_added), "removed": brief(removed), "moved": moved}
@@ -0,0 +1,126 @@
+"""
+Near-duplicate syllabus detection.
+
+Sections of one course share a syllabus that differs only in instructor,
+room and office hours, so each section misses the exact text cache. Every
+cached extraction stores a one-permutation MinHash signature of its word
+shingles (each shingle hashed once into one of 64 bins, keeping the minimum
+per bin) and the signature's LSH band keys (`lsh_bands`, an indexed array on MongoDB). A new
+text is looked up by its band keys, the candidates are ranked by estimated
+Jaccard similarity, and the best one above NEAR_DUPLICATE_THRESHOLD is
+reused only if its date-bearing lines are identical to the new text's, so
+a moved deadline always gets a fresh extraction. Texts too short to fill a
+signature (fewer than NEAR_DUPLICATE_MIN_SHINGLES shingles) get no band
+keys, so they are neither looked up nor found.
+
+With 64 bins in 16 bands of 4 rows, pairs at 0.8 similarity share
+a band with probability ~0.9998, pairs at 0.3 with ~0.12.
+"""
+import hashlib
+import os
+import re
+
+from backend.date_parser import DATE_TOKEN_RE
+
+
+NEAR_DUPLICATE_ENABLED = os.getenv("NEAR_DUPLICATE_ENABLED", "true").lower() == "true"
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.85"))
+# LSH candidates compared per lookup
+NEAR_DUPLICATE_MAX_CANDIDATES = 20
+
+SHINGLE_WORDS = 5
+MINHASH_BINS = 64
+LSH_BANDS = 16
+_ROWS_PER_BAND = MINHASH_BINS // LSH_BANDS
+# Shorter texts leave most bins empty, and empty bins say nothing about overlap.
+NEAR_DUPLICATE_MIN_SHINGLES = MINHASH_BINS
+# Shingle hashes are 62-bit so signature values fit in a BSON int64; this
+# marks a bin no shingle fell into.
+_EMPTY_BIN = 1 << 62
+_WORD_RE = re.compile(r"\w+")
+
+
+def _shingle_hashes(text: str) -> set:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    return {
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big") >> 2
+        for shingle in shingles
+    }
+
+
+def minhash_signature(text: str) -> list:
+    """One-permutation MinHash signature (MINHASH_BINS ints) of the text's word shingles."""
+    return _signature(_shingle_hashes(text))
+
+
+def _signature(shingle_hashes: set) -> list:
+    signature = [_EMPTY_BIN] * MINHASH_BINS
+    for value in shingle_hashes:
+        index, rest = value % MINHASH_BINS, value // MINHASH_BINS
+        if rest < signature[index]:
+            signature[index] = rest
+    return signature
+
+
+def lsh_bands(signature: list, namespace: str = "") -> list:
+    """
+    LSH bucket keys of a signature.
+
+    Args:
+        signature: minhash_signature() output
+        namespace: Prefix separating incompatible extractions (model, prompt version, term)
+
+    Returns:
+        One key per band with at least one filled bin; documents sharing any
+        key are candidates
+    """
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * _ROWS_PER_BAND:(band + 1) * _ROWS_PER_BAND]
+        if all(row == _EMPTY_BIN for row in rows):
+            # Every short text shares an all-empty band.
+            continue
+        digest = hashlib.blake2b(repr(rows).encode("ascii"), digest_size=8).hexdigest()
+        keys.append(f"{namespace}{band:02d}{digest}")
+    return keys
+
+
+def estimate_similarity(signature_a: list, signature_b: list) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    if not signature_a or len(signature_a) != len(signature_b):
+        return 0.0
+    # Bins empty in both signatures carry no evidence either way.
+    filled = [(a, b) for a, b in zip(signature_a, signature_b) if a != _EMPTY_BIN or b != _EMPTY_BIN]
+    if not filled:
+        return 0.0
+    return sum(1 for a, b in filled if a == b) / len(filled)
+
+
+def date_line_fingerprint(text: str) -> list:
+    """Sorted hashes of the whitespace/case-normalized lines that carry a date."""
+    fingerprint = set()
+    for line in text.split("\n"):
+        if DATE_TOKEN_RE.search(line):
+            normalized = " ".join(line.lower().split())
+            fingerprint.add(hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).hexdigest())
+    return sorted(fingerprint)
+
+
+def text_fingerprint(text: str, namespace: str = "") -> dict:
+    """The fields stored on a cache document for near-duplicate lookups."""
+    shingle_hashes = _shingle_hashes(text)
+    signature = _signature(shingle_hashes)
+    return {
+        "minhash": signature,
+        "lsh_bands": lsh_bands(signature, namespace) if len(shingle_hashes) >= NEAR_DUPLICATE_MIN_SHINGLES else [],
+        "date_lines": date_line_fingerprint(text),
+    }
+
+
+def diff_date_lines(fingerprint_a: list, fingerprint_b: list) -> int:
+    """Number of date lines present in only one of two fingerprints."""
+    return len(set(fingerprint_a) ^ set(fingerprint_b))
@@ -0,0 +1,129 @@
+"""
+Request coalescing for identical uploads.
+
+SingleFlight makes concurrent callers with the same key (the PDF hash) wait
+on one in-flight call and share its result within a process. MongoLease
+extends this across processes: the first process to insert a lease document
+does the work, the others wait for the cached result to appear.
+"""
+import time
+import uuid
+from datetime import datetime, timedelta
+from threading import Event, Lock
+
+from pymongo.errors import DuplicateKeyError
+
+
+class _Call:
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class AbandonedCall(Exception):
+    """Raised to waiters when the leading caller went away without a result."""
+
+
+class SingleFlight:
+    """Per-key coalescing of concurrent calls within one process."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls = {}
+
+    def do(self, key: str, fn, *args, **kwargs):
+        """
+        Run `fn(*args, **kwargs)` once per key among concurrent callers.
+
+        Returns:
+            (result, shared) where shared is True for callers that waited on
+            another caller's call. Exceptions are re-raised to every waiter.
+        """
+        call, leader = self.join(key)
+        if not leader:
+            return self.wait(call), True
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result)
+        return result, False
+
+    def join(self, key: str):
+        """
+        Join the in-flight call for a key, or start one.
+
+        For callers that cannot run the work inside do() (e.g. generators).
+        The leader must end the call with finish(); the others wait().
+
+        Returns:
+            (call, leader)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+        return call, leader
+
+    def wait(self, call):
+        """Block until the leader finishes; return its result or raise its error."""
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def finish(self, key: str, call, result=None, error: BaseException = None):
+        call.result = result
+        call.error = error
+        with self._lock:
+            self._calls.pop(key, None)
+        call.done.set()
+
+
+class MongoLease:
+    """Short-lived exclusive leases stored as documents in a MongoDB collection."""
+
+    def __init__(self, collection, ttl_seconds: int, poll_interval: float = 0.5):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.poll_interval = poll_interval
+        self.owner = uuid.uuid4().hex
+
+    def acquire(self, key: str) -> bool:
+        now = datetime.utcnow()
+        lease = {"_id": key, "owner": self.owner, "expires_at": now + timedelta(seconds=self.ttl_seconds)}
+        try:
+            self.collection.insert_one(lease)
+            return True
+        except DuplicateKeyError:
+            pass
+        # The TTL monitor only runs about once a minute, so take over stale leases here.
+        taken = self.collection.find_one_and_replace({"_id": key, "expires_at": {"$lt": now}}, lease)
+        return taken is not None
+
+    def release(self, key: str):
+        self.collection.delete_one({"_id": key, "owner": self.owner})
+
+    def wait(self, key: str, check, timeout: float = None):
+        """
+        Poll until `check()` returns a value, the lease disappears or expires,
+        or the timeout passes.
+
+        Returns:
+            The first non-None value from check(), or None
+        """
+        deadline = time.monotonic() + (timeout if timeout is not None else self.ttl_seconds)
+        while time.monotonic() < deadline:
+            value = check()
+            if value is not None:
+                return value
+            lease = self.collection.find_one({"_id": key})
+            if lease is None or lease["expires_at"] < datetime.utcnow():
+                return check()
+            time.sleep(self.poll_interval)
+        return None
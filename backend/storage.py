@@ -0,0 +1,638 @@
+"""
+Document storage backends.
+
+The app keeps small JSON-like documents keyed by `_id` (cached extractions,
+study plans). DocumentStore is the narrow interface the routes use; the
+implementation is picked by STORAGE_BACKEND (see backend/config/storage.py):
+
+    - MongoDocumentStore:  a MongoDB collection (TTL via a TTL index)
+    - SQLiteDocumentStore: a table in a local SQLite file in WAL mode, for
+                           single-box deployments without a network database
+    - MemoryDocumentStore: process-local dicts (tests, benchmarks, offline dev)
+
+Queries cover what the app needs: equality, {"$ne": value}, {"$exists": bool}
+and {"$in": [values]} on top-level or dotted fields; like MongoDB, "$in" on
+an array field matches if any element is listed. Stores with a TTL field hide
+documents once `ttl_field + ttl_seconds` has passed and purge them lazily.
+"""
+import copy
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError
+
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "coursetrack.db")
+
+COURSE_TTL_SECONDS = 60 * 60 * 24 * 150
+STUDY_PLAN_TTL_SECONDS = int(os.getenv("STUDY_PLAN_CACHE_TTL_SECONDS", str(60 * 60 * 24 * 30)))
+
+# Local backends purge expired documents once every this many writes.
+PURGE_EVERY_WRITES = 500
+
+
+class DatabaseUnavailableError(ConnectionFailure):
+    """Raised instead of blocking when the storage backend is not reachable yet."""
+
+
+# ----------------------------
+# Document helpers
+# ----------------------------
+def _get_path(doc: dict, path: str):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None, False
+        value = value[part]
+    return value, True
+
+
+def _set_path(doc: dict, path: str, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        child = doc.get(part)
+        if not isinstance(child, dict):
+            child = doc[part] = {}
+        doc = child
+    doc[parts[-1]] = value
+
+
+def _unset_path(doc: dict, path: str):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(parts[-1], None)
+
+
+def _matches(doc: dict, match: dict) -> bool:
+    for path, condition in (match or {}).items():
+        value, present = _get_path(doc, path)
+        if isinstance(condition, dict) and "$ne" in condition:
+            if present and value == condition["$ne"]:
+                return False
+        elif isinstance(condition, dict) and "$exists" in condition:
+            if present != bool(condition["$exists"]):
+                return False
+        elif isinstance(condition, dict) and "$in" in condition:
+            values = value if isinstance(value, list) else [value]
+            if not present or not any(item in condition["$in"] for item in values):
+                return False
+        elif not present or value != condition:
+            return False
+    return True
+
+
+def _project(doc: dict, fields):
+    if fields is None:
+        return doc
+    return {name: doc[name] for name in ("_id", *fields) if name in doc}
+
+
+def _apply_update(doc: dict, set_fields: dict = None, unset_fields=()):
+    for path, value in (set_fields or {}).items():
+        _set_path(doc, path, copy.deepcopy(value))
+    for path in unset_fields:
+        _unset_path(doc, path)
+
+
+class DocumentStore:
+    """Interface shared by all backends. Documents are plain dicts with an `_id`."""
+
+    def get(self, doc_id: str, fields=None):
+        """Return the document (only `fields` plus `_id` if given), or None."""
+        raise NotImplementedError
+
+    def find_one(self, match: dict, fields=None):
+        """Return the first document matching `match`, or None."""
+        raise NotImplementedError
+
+    def iter_documents(self, match: dict, fields=None):
+        """Yield every document matching `match`."""
+        raise NotImplementedError
+
+    def find_page(self, match: dict, order_field: str, after=None, limit: int = 50, fields=None) -> list:
+        """
+        Return up to `limit` documents matching `match`, ascending by `order_field`.
+
+        Args:
+            match: Query conditions
+            order_field: Field to sort and page by (its values must be unique within `match`)
+            after: Only documents whose `order_field` is greater than this (keyset cursor)
+            limit: Page size
+            fields: Projection
+
+        Returns:
+            List of documents
+        """
+        raise NotImplementedError
+
+    def count(self, match: dict) -> int:
+        """Number of documents matching `match`."""
+        raise NotImplementedError
+
+    def insert_if_absent(self, doc: dict) -> bool:
+        """Insert `doc`; return False (and change nothing) if its `_id` exists."""
+        raise NotImplementedError
+
+    def update_fields(self, doc_id: str, set_fields: dict = None, unset_fields=(),
+                      match: dict = None, upsert: bool = False) -> bool:
+        """
+        Set and unset (dotted) fields of one document.
+
+        Args:
+            doc_id: Document `_id`
+            set_fields: Field path -> new value
+            unset_fields: Field paths to remove
+            match: Extra conditions the document must satisfy
+            upsert: Create the document if it does not exist
+
+        Returns:
+            True if a document was updated or created
+        """
+        raise NotImplementedError
+
+    def bulk_update_fields(self, updates: list) -> int:
+        """Apply (doc_id, set_fields, match) updates; return how many matched."""
+        return sum(1 for doc_id, set_fields, match in updates if self.update_fields(doc_id, set_fields, match=match))
+
+    def apply_writes(self, operations: list):
+        """
+        Apply queued writes in order (see backend/write_behind.py).
+
+        Args:
+            operations: ("insert", doc) and
+                ("update", doc_id, set_fields, unset_fields, match, upsert) tuples;
+                inserts of existing `_id`s are skipped
+        """
+        for operation in operations:
+            if operation[0] == "insert":
+                self.insert_if_absent(operation[1])
+            else:
+                _, doc_id, set_fields, unset_fields, match, upsert = operation
+                self.update_fields(doc_id, set_fields, unset_fields, match=match, upsert=upsert)
+
+    def trim(self, max_entries: int, order_field: str) -> int:
+        """Delete the documents with the smallest `order_field` beyond `max_entries`."""
+        raise NotImplementedError
+
+    def purge_expired(self) -> int:
+        """Delete expired documents; returns how many were removed."""
+        return 0
+
+
+# ----------------------------
+# MongoDB
+# ----------------------------
+class MongoDocumentStore(DocumentStore):
+    """Thin adapter over a pymongo collection (expiry is the TTL index's job)."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    @staticmethod
+    def _projection(fields):
+        return {name: 1 for name in fields} if fields is not None else None
+
+    def get(self, doc_id: str, fields=None):
+        return self.collection.find_one({"_id": doc_id}, self._projection(fields))
+
+    def find_one(self, match: dict, fields=None):
+        return self.collection.find_one(match, self._projection(fields))
+
+    def iter_documents(self, match: dict, fields=None):
+        return self.collection.find(match, self._projection(fields))
+
+    def find_page(self, match: dict, order_field: str, after=None, limit: int = 50, fields=None) -> list:
+        query = dict(match)
+        if after is not None:
+            query[order_field] = {"$gt": after}
+        cursor = self.collection.find(query, self._projection(fields)).sort(order_field, 1).limit(limit)
+        return list(cursor)
+
+    def count(self, match: dict) -> int:
+        return self.collection.count_documents(match)
+
+    def insert_if_absent(self, doc: dict) -> bool:
+        try:
+            self.collection.insert_one(doc)
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def update_fields(self, doc_id: str, set_fields: dict = None, unset_fields=(),
+                      match: dict = None, upsert: bool = False) -> bool:
+        update = {}
+        if set_fields:
+            update["$set"] = set_fields
+        if unset_fields:
+            update["$unset"] = {path: "" for path in unset_fields}
+        if not update:
+            return False
+        result = self.collection.update_one({"_id": doc_id, **(match or {})}, update, upsert=upsert)
+        return result.modified_count > 0 or result.upserted_id is not None
+
+    def bulk_update_fields(self, updates: list) -> int:
+        if not updates:
+            return 0
+        operations = [
+            UpdateOne({"_id": doc_id, **(match or {})}, {"$set": set_fields})
+            for doc_id, set_fields, match in updates
+        ]
+        return self.collection.bulk_write(operations, ordered=False).modified_count
+
+    def apply_writes(self, operations: list):
+        requests = []
+        for operation in operations:
+            if operation[0] == "insert":
+                requests.append(InsertOne(operation[1]))
+                continue
+            _, doc_id, set_fields, unset_fields, match, upsert = operation
+            update = {}
+            if set_fields:
+                update["$set"] = set_fields
+            if unset_fields:
+                update["$unset"] = {path: "" for path in unset_fields}
+            if update:
+                requests.append(UpdateOne({"_id": doc_id, **(match or {})}, update, upsert=upsert))
+
+        # Ordered, so later writes see earlier ones; a duplicate insert stops
+        # the batch, and the rest is resubmitted past it.
+        start = 0
+        while start < len(requests):
+            try:
+                self.collection.bulk_write(requests[start:], ordered=True)
+                return
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors") or []
+                if not errors or errors[0].get("code") != 11000:
+                    raise
+                start += errors[0]["index"] + 1
+
+    def trim(self, max_entries: int, order_field: str) -> int:
+        excess = self.collection.estimated_document_count() - max_entries
+        if excess <= 0:
+            return 0
+        oldest = self.collection.find({}, {"_id": 1}).sort(order_field, 1).limit(excess)
+        return self.collection.delete_many({"_id": {"$in": [doc["_id"] for doc in oldest]}}).deleted_count
+
+
+# ----------------------------
+# Local backends
+# ----------------------------
+class _LocalDocumentStore(DocumentStore):
+    """Shared TTL and update logic for backends that update documents in Python."""
+
+    def __init__(self, ttl_field: str = None, ttl_seconds: int = None):
+        self.ttl_field = ttl_field
+        self.ttl_seconds = ttl_seconds
+        self._writes = 0
+        self._write_lock = threading.Lock()
+
+    def _expires_at(self, doc: dict):
+        if not self.ttl_field or not self.ttl_seconds:
+            return None
+        stamp = doc.get(self.ttl_field)
+        if not isinstance(stamp, datetime):
+            return None
+        return stamp + timedelta(seconds=self.ttl_seconds)
+
+    def _expired(self, doc: dict, now: datetime) -> bool:
+        expires_at = self._expires_at(doc)
+        return expires_at is not None and expires_at <= now
+
+    def _count_write(self):
+        with self._write_lock:
+            self._writes += 1
+            due = self._writes % PURGE_EVERY_WRITES == 0
+        if due:
+            self.purge_expired()
+
+    def _modify(self, doc_id: str, mutate, upsert_doc: dict = None):
+        """Run `mutate(doc) -> bool` on a document atomically; see subclasses."""
+        raise NotImplementedError
+
+    def update_fields(self, doc_id: str, set_fields: dict = None, unset_fields=(),
+                      match: dict = None, upsert: bool = False) -> bool:
+        def mutate(doc):
+            if not _matches(doc, match):
+                return False
+            _apply_update(doc, set_fields, unset_fields)
+            return True
+        return self._modify(doc_id, mutate, {"_id": doc_id} if upsert else None)
+
+
+class MemoryDocumentStore(_LocalDocumentStore):
+    """Process-local store; contents are lost on restart."""
+
+    def __init__(self, ttl_field: str = None, ttl_seconds: int = None):
+        super().__init__(ttl_field, ttl_seconds)
+        self._docs = {}
+        self._lock = threading.RLock()
+
+    def _live(self, doc_id: str):
+        doc = self._docs.get(doc_id)
+        if doc is not None and self._expired(doc, datetime.utcnow()):
+            del self._docs[doc_id]
+            return None
+        return doc
+
+    def get(self, doc_id: str, fields=None):
+        with self._lock:
+            doc = self._live(doc_id)
+            return copy.deepcopy(_project(doc, fields)) if doc is not None else None
+
+    def find_one(self, match: dict, fields=None):
+        for doc in self.iter_documents(match, fields):
+            return doc
+        return None
+
+    def iter_documents(self, match: dict, fields=None):
+        now = datetime.utcnow()
+        with self._lock:
+            found = [
+                copy.deepcopy(_project(doc, fields)) for doc in self._docs.values()
+                if not self._expired(doc, now) and _matches(doc, match)
+            ]
+        return iter(found)
+
+    def find_page(self, match: dict, order_field: str, after=None, limit: int = 50, fields=None) -> list:
+        now = datetime.utcnow()
+        with self._lock:
+            found = [
+                doc for doc in self._docs.values()
+                if not self._expired(doc, now) and _matches(doc, match)
+                and (after is None or (doc.get(order_field) is not None and doc[order_field] > after))
+            ]
+            found.sort(key=lambda doc: _sort_key(doc.get(order_field)))
+            return [copy.deepcopy(_project(doc, fields)) for doc in found[:limit]]
+
+    def count(self, match: dict) -> int:
+        now = datetime.utcnow()
+        with self._lock:
+            return sum(1 for doc in self._docs.values() if not self._expired(doc, now) and _matches(doc, match))
+
+    def insert_if_absent(self, doc: dict) -> bool:
+        with self._lock:
+            if self._live(doc["_id"]) is not None:
+                return False
+            self._docs[doc["_id"]] = copy.deepcopy(doc)
+        self._count_write()
+        return True
+
+    def _modify(self, doc_id: str, mutate, upsert_doc: dict = None):
+        with self._lock:
+            doc = self._live(doc_id)
+            created = doc is None
+            if created:
+                if upsert_doc is None:
+                    return False
+                doc = copy.deepcopy(upsert_doc)
+            changed = mutate(doc)
+            if changed or created:
+                self._docs[doc_id] = doc
+        self._count_write()
+        return changed
+
+    def trim(self, max_entries: int, order_field: str) -> int:
+        with self._lock:
+            excess = len(self._docs) - max_entries
+            if excess <= 0:
+                return 0
+            ordered = sorted(self._docs.values(), key=lambda doc: _sort_key(doc.get(order_field)))
+            for doc in ordered[:excess]:
+                del self._docs[doc["_id"]]
+            return excess
+
+    def purge_expired(self) -> int:
+        now = datetime.utcnow()
+        with self._lock:
+            expired = [doc_id for doc_id, doc in self._docs.items() if self._expired(doc, now)]
+            for doc_id in expired:
+                del self._docs[doc_id]
+        return len(expired)
+
+
+def _sort_key(value):
+    # None sorts first, like a missing field in a MongoDB ascending sort.
+    return (value is not None, value if value is not None else 0)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _json_object_hook(obj: dict):
+    if len(obj) == 1 and "$date" in obj:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def _dumps(doc: dict) -> str:
+    return json.dumps(doc, default=_json_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def _loads(data: str) -> dict:
+    return json.loads(data, object_hook=_json_object_hook)
+
+
+class SQLiteDocumentStore(_LocalDocumentStore):
+    """
+    One table of JSON documents in a SQLite database in WAL mode.
+
+    Each thread gets its own connection. Updates run in BEGIN IMMEDIATE
+    transactions, so read-modify-write cycles are atomic across threads and
+    processes sharing the file. `indexes` lists fields (or tuples of fields,
+    for a compound index) that queries filter or page on, each backed by an
+    expression index.
+    """
+
+    def __init__(self, path: str, table: str, ttl_field: str = None, ttl_seconds: int = None, indexes=()):
+        super().__init__(ttl_field, ttl_seconds)
+        if not table.isidentifier():
+            raise ValueError(f"invalid table name: {table!r}")
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at TEXT)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_expires_at ON {table}(expires_at)")
+            for index in indexes:
+                paths = (index,) if isinstance(index, str) else tuple(index)
+                name = "_".join("".join(ch if ch.isalnum() else "_" for ch in path) for path in paths)
+                columns = ", ".join(self._extract(path) for path in paths)
+                conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_{name} ON {table}({columns})")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return _Transaction(conn)
+
+    @staticmethod
+    def _extract(path: str) -> str:
+        # Paths come from code, not user input; quoting keeps dotted keys intact.
+        json_path = "$" + "".join('."' + part.replace('"', '\\"') + '"' for part in path.split("."))
+        return "json_extract(data, '" + json_path.replace("'", "''") + "')"
+
+    def _where(self, match: dict):
+        clauses = ["(expires_at IS NULL OR expires_at > ?)"]
+        params = [datetime.utcnow().isoformat()]
+        for path, condition in (match or {}).items():
+            if path == "_id":
+                clauses.append("id = ?")
+                params.append(condition)
+                continue
+            column = self._extract(path)
+            if isinstance(condition, dict) and "$ne" in condition:
+                if condition["$ne"] is None:
+                    clauses.append(f"{column} IS NOT NULL")
+                else:
+                    clauses.append(f"({column} IS NULL OR {column} != ?)")
+                    params.append(condition["$ne"])
+            elif isinstance(condition, dict) and "$exists" in condition:
+                type_column = column.replace("json_extract(", "json_type(", 1)
+                clauses.append(f"{type_column} IS {'NOT ' if condition['$exists'] else ''}NULL")
+            elif isinstance(condition, dict) and "$in" in condition:
+                # json_each walks array elements (or the scalar itself); not index-backed.
+                values = list(condition["$in"]) or [None]
+                each = column.replace("json_extract(", "json_each(", 1)
+                placeholders = ", ".join("?" * len(values))
+                clauses.append(f"EXISTS (SELECT 1 FROM {each} WHERE value IN ({placeholders}))")
+                params.extend(values)
+            elif condition is None:
+                clauses.append(f"{column} IS NULL")
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(condition)
+        return " AND ".join(clauses), params
+
+    def get(self, doc_id: str, fields=None):
+        return self.find_one({"_id": doc_id}, fields)
+
+    def find_one(self, match: dict, fields=None):
+        for doc in self.iter_documents(match, fields, limit=1):
+            return doc
+        return None
+
+    def iter_documents(self, match: dict, fields=None, limit: int = None):
+        where, params = self._where(match)
+        sql = f"SELECT data FROM {self.table} WHERE {where}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return iter([_project(_loads(row[0]), fields) for row in rows])
+
+    def find_page(self, match: dict, order_field: str, after=None, limit: int = 50, fields=None) -> list:
+        where, params = self._where(match)
+        column = self._extract(order_field)
+        if after is not None:
+            where += f" AND {column} > ?"
+            params.append(after)
+        sql = f"SELECT data FROM {self.table} WHERE {where} ORDER BY {column} LIMIT ?"
+        with self._connect() as conn:
+            rows = conn.execute(sql, (*params, int(limit))).fetchall()
+        return [_project(_loads(row[0]), fields) for row in rows]
+
+    def count(self, match: dict) -> int:
+        where, params = self._where(match)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {self.table} WHERE {where}", params).fetchone()[0]
+
+    def _row_values(self, doc: dict):
+        expires_at = self._expires_at(doc)
+        return _dumps(doc), expires_at.isoformat() if expires_at else None
+
+    def insert_if_absent(self, doc: dict) -> bool:
+        data, expires_at = self._row_values(doc)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # An expired row with the same id is dead; replace it.
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE id = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                (doc["_id"], datetime.utcnow().isoformat()),
+            )
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO {self.table} (id, data, expires_at) VALUES (?, ?, ?)",
+                (doc["_id"], data, expires_at),
+            )
+            inserted = cursor.rowcount > 0
+        self._count_write()
+        return inserted
+
+    def _modify(self, doc_id: str, mutate, upsert_doc: dict = None):
+        where, params = self._where({"_id": doc_id})
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(f"SELECT data FROM {self.table} WHERE {where}", params).fetchone()
+            created = row is None
+            if created:
+                if upsert_doc is None:
+                    return False
+                doc = copy.deepcopy(upsert_doc)
+            else:
+                doc = _loads(row[0])
+            changed = mutate(doc)
+            if changed or created:
+                data, expires_at = self._row_values(doc)
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (id, data, expires_at) VALUES (?, ?, ?)",
+                    (doc_id, data, expires_at),
+                )
+        self._count_write()
+        return changed
+
+    def trim(self, max_entries: int, order_field: str) -> int:
+        column = self._extract(order_field)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            total = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            excess = total - max_entries
+            if excess <= 0:
+                return 0
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE id IN "
+                f"(SELECT id FROM {self.table} ORDER BY {column} IS NOT NULL, {column} LIMIT ?)",
+                (excess,),
+            )
+        return excess
+
+    def purge_expired(self) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (datetime.utcnow().isoformat(),),
+            )
+        return cursor.rowcount
+
+
+class _Transaction:
+    """Context manager committing (or rolling back) an explicit transaction, if one was begun."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.conn.in_transaction:
+            if exc_type is None:
+                self.conn.execute("COMMIT")
+            else:
+                self.conn.execute("ROLLBACK")
+        return False
@@ -0,0 +1,81 @@
+"""
+Incremental parsing of a JSON array that arrives in pieces.
+
+A streamed model answer is a JSON array delivered a few characters at a time.
+JsonArrayStreamParser returns each top-level object as soon as its closing
+brace arrives, so extracted events can be forwarded before the array is
+complete. Anything before the opening bracket (stray prose, a ```json fence)
+is ignored, as is anything after the closing one.
+"""
+import json
+
+
+class JsonArrayStreamParser:
+    """Feed text fragments in; get completed top-level array elements out."""
+
+    def __init__(self):
+        self.started = False
+        self.finished = False
+        self.skipped = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._current = []
+
+    def feed(self, fragment: str) -> list:
+        """
+        Consume the next piece of the stream.
+
+        Args:
+            fragment: Text exactly as received (may split tokens anywhere)
+
+        Returns:
+            List of objects (dicts) completed by this fragment; elements that
+            are not valid JSON objects are counted in `skipped` and dropped
+        """
+        completed = []
+        for ch in fragment:
+            if self.finished:
+                break
+            if not self.started:
+                self.started = ch == "["
+                continue
+
+            if self._depth == 0:
+                # Between elements: only an opening brace or the end matters.
+                if ch == "{":
+                    self._depth = 1
+                    self._current = [ch]
+                elif ch == "]":
+                    self.finished = True
+                continue
+
+            self._current.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit("".join(self._current), completed)
+                    self._current = []
+        return completed
+
+    def _emit(self, raw: str, completed: list):
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            self.skipped += 1
+            return
+        if isinstance(value, dict):
+            completed.append(value)
+        else:
+            self.skipped += 1
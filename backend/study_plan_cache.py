@@ -0,0 +1,125 @@
+"""
+Content-addressed cache of generated study plans.
+
+Plans are keyed by a canonical hash of the assignment list, the course name,
+the model and the study-plan prompt version. The list is reduced to the
+fields the prompt uses and sorted, so the same set of deadlines reuses its
+plan whichever PDF it came from, and an edited list that ends up identical
+to an earlier one is a hit as well.
+
+Entries expire once unused for the TTL (the store's TTL on last_used_at,
+refreshed by a hit at most once per STUDY_PLAN_TOUCH_INTERVAL_SECONDS so
+reads stay reads), and the store is trimmed back to a maximum number of
+entries, least recently used first.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from threading import Lock
+
+
+STUDY_PLAN_CACHE_MAX_ENTRIES = int(os.getenv("STUDY_PLAN_CACHE_MAX_ENTRIES", "20000"))
+# Size checks cost a count, so they run once every this many writes.
+STUDY_PLAN_CACHE_TRIM_EVERY = 50
+# A hit refreshes last_used_at only when it is older than this; the TTL is
+# counted in weeks, so day granularity is plenty.
+STUDY_PLAN_TOUCH_INTERVAL_SECONDS = 86400
+
+
+def canonical_assignments(assignments: list) -> list:
+    """Reduce assignments to sorted (title, due_date, type) triples."""
+    canonical = []
+    for item in assignments or []:
+        if not isinstance(item, dict):
+            continue
+        canonical.append((
+            " ".join(str(item.get("title") or "Untitled").split()),
+            item.get("due_date") or None,
+            str(item.get("type") or "assignment").strip().lower(),
+        ))
+    canonical.sort(key=lambda entry: (entry[1] or "", entry[0].lower(), entry[2]))
+    return canonical
+
+
+def study_plan_cache_key(assignments: list, course_name: str, model: str, prompt_version: str) -> str:
+    payload = json.dumps(
+        [prompt_version, model, course_name.strip(), canonical_assignments(assignments)],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StudyPlanCache:
+    """Study plans kept in a DocumentStore with TTL and size bounds."""
+
+    def __init__(self, store, max_entries: int = STUDY_PLAN_CACHE_MAX_ENTRIES,
+                 trim_every: int = STUDY_PLAN_CACHE_TRIM_EVERY, writer=None):
+        """
+        Args:
+            store: DocumentStore holding the plans
+            max_entries: Size bound enforced by periodic trims
+            trim_every: Writes between trims
+            writer: Optional WriteBehindQueue; puts are then queued instead of written inline
+        """
+        self.store = store
+        self.writer = writer
+        self.max_entries = max_entries
+        self.trim_every = trim_every
+        self._writes = 0
+        self._lock = Lock()
+
+    def get(self, key: str):
+        """
+        Look up a plan, refreshing a stale last-used time.
+
+        Returns:
+            The study plan dict, or None on a miss
+        """
+        try:
+            doc = self.store.get(key, ("plan", "last_used_at"))
+        except Exception as e:
+            print(f"Study plan cache lookup failed: {e}")
+            return None
+        if doc is None:
+            return None
+        self._touch(key, doc.get("last_used_at"))
+        return doc.get("plan")
+
+    def _touch(self, key: str, last_used_at):
+        now = datetime.utcnow()
+        if isinstance(last_used_at, datetime) and now - last_used_at < timedelta(seconds=STUDY_PLAN_TOUCH_INTERVAL_SECONDS):
+            return
+        try:
+            if self.writer is not None:
+                self.writer.submit(self.store, ("update", key, {"last_used_at": now}, (), None, False))
+            else:
+                self.store.update_fields(key, {"last_used_at": now})
+        except Exception as e:
+            print(f"Study plan cache refresh failed: {e}")
+
+    def put(self, key: str, plan: dict, course_name: str):
+        fields = {"plan": plan, "course_name": course_name, "last_used_at": datetime.utcnow()}
+        try:
+            if self.writer is not None:
+                self.writer.submit(self.store, ("update", key, fields, (), None, True))
+            else:
+                self.store.update_fields(key, fields, upsert=True)
+        except Exception as e:
+            print(f"Study plan cache save failed: {e}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.trim_every == 0
+        if due:
+            self._trim()
+
+    def _trim(self):
+        try:
+            deleted = self.store.trim(self.max_entries, "last_used_at")
+            if deleted:
+                print(f"Trimmed {deleted} least recently used study plans")
+        except Exception as e:
+            print(f"Study plan cache trim failed: {e}")
@@ -0,0 +1,111 @@
+"""
+Content-addressed on-disk cache of extracted PDF page texts.
+
+Entries are keyed by the PDF SHA-256 plus the extractor version, so upgrading
+the event parser or the LLM prompt reuses the pdfplumber output while a new
+extractor version naturally misses. The cache directory is bounded in size;
+least recently used entries (by file mtime, refreshed on every hit) are
+evicted first.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from threading import Lock
+
+
+TEXT_CACHE_ENABLED = os.getenv("TEXT_CACHE_ENABLED", "true").lower() == "true"
+TEXT_CACHE_DIR = os.getenv("TEXT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "coursetrack-text-cache"))
+TEXT_CACHE_MAX_BYTES = int(float(os.getenv("TEXT_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+
+class PageTextCache:
+    """Size-bounded LRU store of page text lists on local disk."""
+
+    def __init__(self, directory: str, max_bytes: int, version: str):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = version
+        self._lock = Lock()
+        self._approx_bytes = None
+
+    def _path(self, file_hash: str) -> str:
+        key = hashlib.sha256(f"{file_hash}:{self.version}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, file_hash: str):
+        """
+        Look up cached page texts.
+
+        Returns:
+            List of page strings, or None on a miss
+        """
+        path = self._path(file_hash)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Page text cache read failed: {e}")
+            return None
+
+        pages = data.get("pages") if isinstance(data, dict) else None
+        return pages if isinstance(pages, list) else None
+
+    def put(self, file_hash: str, pages: list):
+        path = self._path(file_hash)
+        payload = json.dumps({"version": self.version, "pages": pages}, ensure_ascii=False).encode("utf-8")
+        if len(payload) > self.max_bytes:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(payload)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Page text cache write failed: {e}")
+            return
+
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = self._scan_size()
+            else:
+                self._approx_bytes += len(payload)
+            if self._approx_bytes > self.max_bytes:
+                self._approx_bytes = self._evict()
+
+    def _entries(self):
+        entries = []
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _mtime, size, _path in self._entries())
+
+    def _evict(self) -> int:
+        # Trim to 90% of the bound so eviction doesn't run on every write.
+        entries = sorted(self._entries())
+        total = sum(size for _mtime, size, _path in entries)
+        target = int(self.max_bytes * 0.9)
+        for _mtime, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        return total
@@ -0,0 +1,166 @@
+"""
+Upload spooling for PDF files.
+
+SpoolingRequest makes Werkzeug write every uploaded file part into a
+HashingSpoolFile, so the SHA-256 is computed while the request body streams
+in. Small uploads stay in memory; larger ones roll over to a temporary file
+that pdfplumber can memory-map instead of copying into a BytesIO.
+"""
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+
+from flask import Request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_MB", "25")) * 1024 * 1024)
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_KB", "512")) * 1024
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+
+class HashingSpoolFile:
+    """
+    Binary file container that hashes data as it is written.
+
+    Data is buffered in memory until it exceeds `spool_size` bytes, then moved
+    to a named temporary file. Writing more than `max_size` bytes raises
+    RequestEntityTooLarge before the rest of the body is buffered.
+    """
+
+    def __init__(self, spool_size: int = UPLOAD_SPOOL_BYTES, max_size: int = MAX_UPLOAD_BYTES):
+        self.spool_size = spool_size
+        self.max_size = max_size
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._buffer = BytesIO()
+        self._file = None
+
+    @property
+    def _active(self):
+        return self._file if self._file is not None else self._buffer
+
+    @property
+    def path(self):
+        """Temporary file path once spooled to disk, otherwise None."""
+        return self._file.name if self._file is not None else None
+
+    def write(self, data) -> int:
+        self.size += len(data)
+        if self.max_size and self.size > self.max_size:
+            # Nothing closes a part that fails mid-parse; drop the spool now.
+            self.close()
+            raise RequestEntityTooLarge(f"upload exceeds {self.max_size} bytes")
+        self._sha256.update(data)
+        if self._file is None and self.size > self.spool_size:
+            self._file = tempfile.NamedTemporaryFile(prefix="coursetrack-upload-", suffix=".pdf", delete=False)
+            self._file.write(self._buffer.getvalue())
+            self._buffer = None
+        return self._active.write(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._active.read(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._active.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._active.tell()
+
+    def flush(self):
+        self._active.flush()
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def hexdigest(self) -> str:
+        return self._sha256.hexdigest()
+
+    def pdf_source(self):
+        """
+        Return something pdfplumber helpers can open without another copy.
+
+        Returns:
+            The temporary file path (opened via mmap) when spooled to disk,
+            otherwise the in-memory bytes
+        """
+        if self._file is not None:
+            self._file.flush()
+            return self._file.name
+        return self._buffer.getvalue()
+
+    def detach(self):
+        """
+        Hand the spooled data over to the caller (e.g. a background job).
+
+        After detaching, close() no longer deletes the temporary file; the
+        caller must pass the returned source to discard_detached() when done.
+
+        Returns:
+            Same value as pdf_source()
+        """
+        source = self.pdf_source()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._buffer = BytesIO()
+        return source
+
+    def close(self):
+        if self._file is not None:
+            path = self._file.name
+            self._file.close()
+            self._file = None
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        elif self._buffer is not None:
+            self._buffer.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None and (self._buffer is None or self._buffer.closed)
+
+
+class SpoolingRequest(Request):
+    """Flask request class that spools and hashes uploaded files as they arrive."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingSpoolFile()
+
+
+def read_upload(file_storage) -> HashingSpoolFile:
+    """
+    Return the hashed spool for an uploaded file.
+
+    Uploads parsed by SpoolingRequest are returned as-is; any other stream is
+    copied chunk by chunk into a new HashingSpoolFile.
+    """
+    stream = file_storage.stream
+    if not isinstance(stream, HashingSpoolFile):
+        spool = HashingSpoolFile()
+        while True:
+            chunk = stream.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            spool.write(chunk)
+        stream = spool
+    stream.seek(0)
+    return stream
+
+
+def discard_detached(source):
+    """Remove the temporary file behind a detached upload source, if any."""
+    if isinstance(source, str):
+        try:
+            os.unlink(source)
+        except OSError:
+            pass
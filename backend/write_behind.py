@@ -0,0 +1,164 @@
+"""
+Write-behind queue for cache writes.
+
+With WRITE_BEHIND_ENABLED, cold responses no longer wait for their cache
+writes: writes are queued and a background thread flushes them in order, in
+batches (one bulk_write per store on MongoDB). The queue is bounded; when it
+is full new writes are dropped, which only costs a later cache miss. Failed
+batches are retried with backoff, then dropped. Pending writes are flushed
+at interpreter exit.
+
+Operations are the tuples DocumentStore.apply_writes() takes:
+
+    ("insert", doc)
+    ("update", doc_id, set_fields, unset_fields, match, upsert)
+
+Both kinds are idempotent, so retrying a partly applied batch is safe.
+"""
+import os
+import queue
+import time
+from threading import Event, Lock, Thread
+
+
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "1000"))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "100"))
+WRITE_BEHIND_FLUSH_MS = int(os.getenv("WRITE_BEHIND_FLUSH_MS", "50"))
+WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", "3"))
+WRITE_BEHIND_SHUTDOWN_SECONDS = 10.0
+
+
+class WriteBehindQueue:
+    """Bounded FIFO of (store, operation) writes flushed by one background thread."""
+
+    def __init__(self, max_pending: int = WRITE_BEHIND_MAX_PENDING, batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+                 flush_interval: float = WRITE_BEHIND_FLUSH_MS / 1000, max_retries: int = WRITE_BEHIND_MAX_RETRIES,
+                 on_written=None):
+        """
+        Args:
+            max_pending: Queue bound; writes beyond it are dropped
+            batch_size: Most writes flushed in one round
+            flush_interval: How long the first write of a round waits for company
+            max_retries: Retries of a failed batch before its writes are dropped
+            on_written: Optional callback(store, doc_ids) after a batch is written
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.on_written = on_written
+        # Unbounded so markers never block; submit() enforces the bound on writes.
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._lock = Lock()
+        self._metrics = {"queued": 0, "written": 0, "retried": 0, "dropped": 0}
+        self._closed = False
+        self._thread = Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def submit(self, store, operation: tuple) -> bool:
+        """Queue a write; returns False (and counts a drop) if the queue is full or closed."""
+        with self._lock:
+            accepted = not self._closed and self._pending < self.max_pending
+            if accepted:
+                self._pending += 1
+                self._metrics["queued"] += 1
+            else:
+                self._metrics["dropped"] += 1
+        if not accepted:
+            if not self._closed:
+                print(f"Write-behind queue full; dropped a cache write ({self.stats()})")
+            return False
+        self._queue.put((store, operation))
+        return True
+
+    def call_after_pending(self, callback):
+        """Run `callback()` on the flusher once every write queued so far is flushed."""
+        if self._closed:
+            callback()
+            return
+        # Markers do not count against max_pending (dropping one would lose
+        # the callback) and never block, as the queue itself is unbounded.
+        self._queue.put((None, callback))
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until everything queued so far is flushed; returns False on timeout."""
+        done = Event()
+        self.call_after_pending(done.set)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = WRITE_BEHIND_SHUTDOWN_SECONDS):
+        """Flush pending writes and stop accepting new ones."""
+        if self._closed:
+            return
+        flushed = self.flush(timeout)
+        self._closed = True
+        print(f"Write-behind queue closed ({'flushed' if flushed else 'flush timed out'}; {self.stats()})")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._metrics, "pending": self._pending}
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._metrics[name] += amount
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(items) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(items)
+
+    def _process(self, items: list):
+        # Consecutive writes to one store form a batch; callbacks run in place.
+        batch_store, batch = None, []
+        for store, item in items:
+            if store is None or store is not batch_store:
+                if batch:
+                    self._write(batch_store, batch)
+                batch_store, batch = store, []
+            if store is None:
+                try:
+                    item()
+                except Exception as e:
+                    print(f"Write-behind callback failed: {e}")
+            else:
+                batch.append(item)
+        if batch:
+            self._write(batch_store, batch)
+
+    def _write(self, store, operations: list):
+        try:
+            self._apply(store, operations)
+        finally:
+            with self._lock:
+                self._pending -= len(operations)
+
+    def _apply(self, store, operations: list):
+        for attempt in range(self.max_retries + 1):
+            try:
+                store.apply_writes(operations)
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self._count("dropped", len(operations))
+                    print(f"Write-behind batch of {len(operations)} dropped after {attempt + 1} attempts: {e} ({self.stats()})")
+                    return
+                self._count("retried", len(operations))
+                print(f"Write-behind batch of {len(operations)} failed, retrying: {e}")
+                time.sleep(min(0.5 * 2 ** attempt, 5.0))
+        self._count("written", len(operations))
+        if self.on_written is not None:
+            try:
+                self.on_written(store, [op[1] if op[0] == "update" else op[1]["_id"] for op in operations])
+            except Exception as e:
+                print(f"Write-behind callback failed: {e}")
@@ -0,0 +1,130 @@
+"""
+Benchmark parse_events_local against the original two-regex implementation.
+
+Usage:
+    python benchmarks/bench_parse_events_local.py [--lines 50000] [--repeat 5]
+
+Synthetic syllabi mix policy prose with dated lines in the formats the local
+parser is expected to recognize.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Benchmarks run offline unless a backend is chosen explicitly.
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+from app import parse_events_local  # noqa: E402
+
+
+# ----------------------------
+# Original implementation (baseline)
+# ----------------------------
+def legacy_parse_flexible_date(date_str: str, default_year: int = None) -> str:
+    if default_year is None:
+        default_year = datetime.now().year
+
+    date_str = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', date_str)
+
+    try:
+        dt = datetime.strptime(date_str, "%b %d")
+        dt = dt.replace(year=default_year)
+        return dt.date().isoformat()
+    except Exception:
+        return None
+
+
+def legacy_parse_events_local(text: str) -> list:
+    events = []
+    current_year = datetime.now().year
+    for line in text.split('\n'):
+        match = re.search(
+            r'(.+?)\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{1,2}',
+            line,
+            re.IGNORECASE
+        )
+        if match:
+            title = match.group(1).strip()
+            date_match = re.search(
+                r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{1,2}',
+                line,
+                re.IGNORECASE
+            )
+            if date_match:
+                parsed = legacy_parse_flexible_date(date_match.group(0), current_year)
+                if parsed:
+                    events.append({"title": title, "due_date": parsed})
+    return events
+
+
+# ----------------------------
+# Synthetic syllabus
+# ----------------------------
+PROSE = [
+    "Students are expected to attend all lectures and labs.",
+    "Academic integrity violations will be reported to the Dean's office.",
+    "Accommodations are available through Accessibility Resources.",
+    "Late submissions lose 10% per day, up to a maximum of 3 days.",
+    "Grading scheme: assignments 30%, midterm 25%, final exam 45%.",
+    "Office hours are held Tuesdays in room 2-115 or by appointment.",
+]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "September", "October", "Nov", "Dec"]
+WEEKDAYS = ["Mon", "Tue", "Wednesday", "Thu", "Fri"]
+
+
+def dated_line(rng: random.Random) -> str:
+    title = rng.choice(["Assignment", "Quiz", "Lab", "Project milestone", "Midterm"]) + f" {rng.randint(1, 12)}"
+    month = rng.choice(MONTHS)
+    day = rng.randint(1, 28)
+    forms = [
+        f"{title} due {month} {day}",
+        f"{title} - {rng.choice(WEEKDAYS)}, {month} {day}th",
+        f"{title} {month} {day}-{min(day + 3, 28)}",
+        f"{title} 2026-{rng.randint(1, 12):02d}-{day:02d}",
+        f"{title} due {rng.randint(1, 12)}/{day}",
+    ]
+    return rng.choice(forms)
+
+
+def synthetic_syllabus(lines: int, dated_ratio: float = 0.2, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(lines):
+        out.append(dated_line(rng) if rng.random() < dated_ratio else rng.choice(PROSE))
+    return "\n".join(out)
+
+
+def best_of(fn, text: str, repeat: int):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = synthetic_syllabus(args.lines)
+    legacy_time, legacy_events = best_of(legacy_parse_events_local, text, args.repeat)
+    new_time, new_events = best_of(parse_events_local, text, args.repeat)
+
+    print(f"lines:   {args.lines}")
+    print(f"legacy:  {legacy_time * 1000:8.1f} ms  {len(legacy_events)} events")
+    print(f"current: {new_time * 1000:8.1f} ms  {len(new_events)} events")
+    print(f"speedup: {legacy_time / new_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -48,12 +48,26 @@ let courseAssignmentsByName = {}; // Map of courseName -> assignments
 let fileHashesByCourseName = {}; // Map of courseName -> file_hash (for caching)
 let currentStudyPlanCourse = ''; // Track currently viewed study plan course
 const ALL_COURSES_VALUE = '__all__';
-let discordMatchesBySource = {}; // Map of filename -> array of handles
+let discordMatchesBySource = {}; // Map of filename -> { fileHash, viewer, items, total, nextCursor }
 let currentCourseNameForCalendar = ''; // Store course name for Google Calendar upload
 let discordAvatarUrl = '';
+let previewStreaming = false; // Preview is open while rows are still streaming in
+let streamRenderTimer = null;
 let discordHandleValue = ''; // Set by Discord OAuth only
 const LOW_ACCURACY_THRESHOLD = 80;
 let canCacheStudyPlan = false; // Only true when preview data is completely untouched
+const JOB_POLL_INTERVAL_MS = 1000;
+const JOB_STAGE_LABELS = {
+    queued: 'Waiting in queue',
+    running: 'Starting',
+    waiting_for_peer: 'Waiting for an identical upload',
+    extracting_text: 'Reading PDF',
+    extracting_events: 'Finding deadlines',
+    caching: 'Saving results'
+};
+// Browsers that can read a fetch body incrementally get rows as they are extracted
+const STREAMING_SUPPORTED = typeof ReadableStream !== 'undefined' && typeof TextDecoder !== 'undefined';
+const STREAM_RENDER_INTERVAL_MS = 150;
 
 // Click to browse
 dropzone.addEventListener('click', () => fileInput.click());
@@ -126,6 +140,38 @@ function setOptInFieldsEnabled(isEnabled) {
     fields.classList.toggle('active', isEnabled);
 }
 
+async function fetchDiscordMatches(fileHash, viewer, cursor) {
+    const response = await fetch('/shared_discords', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            file_hash: fileHash,
+            viewer_handle: viewer,
+            cursor: cursor || undefined
+        })
+    });
+    if (!response.ok) {
+        throw new Error(`shared_discords failed: ${response.status}`);
+    }
+    return response.json();
+}
+
+async function loadMoreDiscordMatches(source) {
+    const matches = discordMatchesBySource[source];
+    if (!matches || !matches.nextCursor || matches.loading) return;
+    matches.loading = true;
+    try {
+        const page = await fetchDiscordMatches(matches.fileHash, matches.viewer, matches.nextCursor);
+        matches.items.push(...(page.items || []));
+        matches.nextCursor = page.next_cursor || null;
+    } catch (err) {
+        console.error(err);
+    } finally {
+        matches.loading = false;
+        renderDiscordMatches();
+    }
+}
+
 function renderDiscordMatches() {
     const entries = Object.entries(discordMatchesBySource);
     if (entries.length === 0) {
@@ -134,9 +180,10 @@ function renderDiscordMatches() {
     }
 
     discordMatches.style.display = 'block';
-    discordMatchesBody.innerHTML = entries.map(([source, handles]) => {
+    discordMatchesBody.innerHTML = entries.map(([source, matches]) => {
         const safeSource = escapeHtml(source);
-        if (!handles || handles.length === 0) {
+        const items = matches.items || [];
+        if (items.length === 0) {
             return `
                 <div class="discord-course-block">
                     <div class="discord-course-title">${safeSource}</div>
@@ -144,21 +191,25 @@ function renderDiscordMatches() {
                 </div>
             `;
         }
-        const pills = handles.map((entry) => {
-            const handle = entry.handle || '';
-            const avatarUrl = entry.avatar_url || '';
-            const isYou = entry.is_you || false;
+        const viewerKey = (matches.viewer || '').toLowerCase();
+        const pills = items.map(([handle, avatarUrl]) => {
+            const isYou = (handle || '').toLowerCase() === viewerKey;
             const defaultAvatar = `<span class="discord-avatar-placeholder">&#128100;</span>`;
             const avatarImg = avatarUrl
                 ? `<img src="${escapeHtml(avatarUrl)}" alt="" onerror="this.outerHTML='<span class=\'discord-avatar-placeholder\'>&#128100;</span>'">`
                 : defaultAvatar;
             const youBadge = isYou ? ' <span class="discord-you-badge">(you)</span>' : '';
-            return `<span class="discord-handle${isYou ? ' discord-handle-you' : ''}">${avatarImg}${escapeHtml(handle)}${youBadge}</span>`;
+            return `<span class="discord-handle${isYou ? ' discord-handle-you' : ''}">${avatarImg}${escapeHtml(handle || '')}${youBadge}</span>`;
         }).join('');
+        const remaining = Math.max((matches.total || 0) - items.length, 0);
+        const moreButton = matches.nextCursor
+            ? `<button type="button" class="discord-more" data-source="${safeSource}"${matches.loading ? ' disabled' : ''}>Show more${remaining ? ` (${remaining})` : ''}</button>`
+            : '';
         return `
             <div class="discord-course-block">
-                <div class="discord-course-title">${safeSource}</div>
+                <div class="discord-course-title">${safeSource} &middot; ${matches.total || items.length}</div>
                 <div class="discord-handle-list">${pills}</div>
+                ${moreButton}
             </div>
         `;
     }).join('');
@@ -166,6 +217,13 @@ function renderDiscordMatches() {
     discordMatchesEmpty.style.display = 'none';
 }
 
+discordMatchesBody.addEventListener('click', (e) => {
+    const button = e.target.closest('.discord-more');
+    if (button) {
+        loadMoreDiscordMatches(button.dataset.source);
+    }
+});
+
 discordOptIn.addEventListener('change', (e) => {
     setOptInFieldsEnabled(e.target.checked);
 });
@@ -310,22 +368,23 @@ uploadForm.addEventListener('submit', async (e) => {
         // Process each PDF
         for (let i = 0; i < selectedFiles.length; i++) {
             const file = selectedFiles[i];
-            setLoading(true, `Processing ${file.name} (${i + 1} of ${selectedFiles.length})...`);
-            
-            const formData = new FormData();
-            formData.append('file', file);
-
-            const response = await fetch('/extract_assignments', {
-                method: 'POST',
-                body: formData
-            });
-
-            if (!response.ok) {
-                const errorText = await response.text();
-                throw new Error(`Failed to process ${file.name}: ${errorText}`);
+            const statusPrefix = `Processing ${file.name} (${i + 1} of ${selectedFiles.length})`;
+            if (!previewStreaming) {
+                setLoading(true, `${statusPrefix}...`);
             }
 
-            const responseData = await response.json();
+            let responseData;
+            if (STREAMING_SUPPORTED) {
+                // Streamed rows are shown right away, then replaced by the final deduplicated list
+                const streamedFrom = extractedAssignments.length;
+                responseData = await streamExtraction(file, (assignment, fileHash) => {
+                    extractedAssignments.push({ ...assignment, source: file.name, file_hash: fileHash });
+                    scheduleStreamRender();
+                });
+                extractedAssignments.splice(streamedFrom);
+            } else {
+                responseData = await fetchExtraction(file, statusPrefix);
+            }
             
             // Handle both new format (with file_hash) and old format (just array)
             let assignments = Array.isArray(responseData) ? responseData : responseData.assignments || [];
@@ -362,19 +421,14 @@ uploadForm.addEventListener('submit', async (e) => {
                         console.error('share_discord failed:', await shareResponse.text());
                     }
 
-                    const matchesResponse = await fetch('/shared_discords', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({
-                            file_hash: fileHash,
-                            viewer_handle: handle
-                        })
-                    });
-
-                    if (matchesResponse.ok) {
-                        const matchesData = await matchesResponse.json();
-                        discordMatchesBySource[file.name] = matchesData.shared_discords || [];
-                    }
+                    const firstPage = await fetchDiscordMatches(fileHash, handle);
+                    discordMatchesBySource[file.name] = {
+                        fileHash,
+                        viewer: handle,
+                        items: firstPage.items || [],
+                        total: firstPage.total || 0,
+                        nextCursor: firstPage.next_cursor || null
+                    };
                 } catch (matchError) {
                     console.error(matchError);
                 }
@@ -382,6 +436,7 @@ uploadForm.addEventListener('submit', async (e) => {
         }
 
         setLoading(false);
+        endPreviewStreaming();
 
         renderDiscordMatches();
         
@@ -397,12 +452,131 @@ uploadForm.addEventListener('submit', async (e) => {
 
     } catch (err) {
         console.error(err);
+        endPreviewStreaming();
+        hidePreview();
         showError(err.message || 'An error occurred');
         setLoading(false);
         submitBtn.disabled = false;
     }
 });
 
+async function fetchExtraction(file, statusPrefix) {
+    const formData = new FormData();
+    formData.append('file', file);
+
+    const response = await fetch('/extract_assignments?mode=async', {
+        method: 'POST',
+        body: formData
+    });
+
+    if (!response.ok) {
+        const errorText = await response.text();
+        throw new Error(`Failed to process ${file.name}: ${errorText}`);
+    }
+
+    const responseData = await response.json();
+
+    // Cold uploads come back as 202 with a job to poll; cache hits return results directly
+    if (response.status === 202) {
+        return waitForExtractionJob(responseData.job_id, statusPrefix);
+    }
+    return responseData;
+}
+
+async function streamExtraction(file, onAssignment) {
+    const formData = new FormData();
+    formData.append('file', file);
+
+    const response = await fetch('/extract_assignments/stream', {
+        method: 'POST',
+        body: formData
+    });
+
+    if (!response.ok || !response.body) {
+        const errorText = await response.text();
+        throw new Error(`Failed to process ${file.name}: ${errorText}`);
+    }
+
+    // NDJSON: start, one line per assignment, then done (or error)
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let fileHash = null;
+    let result = null;
+
+    const handleLine = (line) => {
+        if (!line.trim()) return;
+        const message = JSON.parse(line);
+        if (message.type === 'start') {
+            fileHash = message.file_hash;
+        } else if (message.type === 'assignment') {
+            onAssignment(message.assignment, fileHash);
+        } else if (message.type === 'done') {
+            result = message;
+        } else if (message.type === 'error') {
+            throw new Error(`Failed to process ${file.name}: ${message.error}`);
+        }
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.forEach(handleLine);
+    }
+    handleLine(buffer + decoder.decode());
+
+    if (!result) {
+        throw new Error(`Extraction of ${file.name} ended unexpectedly`);
+    }
+    return result;
+}
+
+function scheduleStreamRender() {
+    if (streamRenderTimer) return;
+    streamRenderTimer = setTimeout(() => {
+        streamRenderTimer = null;
+        if (!previewStreaming) {
+            // First rows: swap the loading overlay for the (still filling) preview
+            previewStreaming = true;
+            setLoading(false);
+            confirmGenerate.disabled = true;
+            showPreview();
+        }
+        renderPreview();
+    }, STREAM_RENDER_INTERVAL_MS);
+}
+
+function endPreviewStreaming() {
+    clearTimeout(streamRenderTimer);
+    streamRenderTimer = null;
+    previewStreaming = false;
+    confirmGenerate.disabled = false;
+}
+
+async function waitForExtractionJob(jobId, statusPrefix) {
+    while (true) {
+        const response = await fetch(`/jobs/${encodeURIComponent(jobId)}`);
+        if (!response.ok) {
+            throw new Error(`Failed to check extraction status: ${await response.text()}`);
+        }
+
+        const job = await response.json();
+        if (job.status === 'done') {
+            return job.result;
+        }
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Extraction failed');
+        }
+
+        const stageLabel = JOB_STAGE_LABELS[job.stage] || 'Working';
+        setLoading(true, `${statusPrefix}: ${stageLabel}...`);
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    }
+}
+
 function renderPreview() {
     if (extractedAssignments.length === 0) {
         previewBody.innerHTML = '<div class="preview-empty">No assignments found</div>';